@@ -0,0 +1,105 @@
+"""
+Process start-to-first-prediction time.
+
+Every scenario runs in a fresh interpreter, like a new container or CLI call,
+and is repeated to smooth out disk-cache effects:
+
+- `api-cbm` / `api-pkl`: import the API, load the shipped CatBoost model from
+  its native `.cbm` file or from the pickle, and score one raw record;
+- `api-npz`: the same with the NumPy backend, which never imports CatBoost;
+- `predict`: import the batch scoring CLI and load the `.cbm` model;
+- `trainer`: import `models.trainer`.
+
+    python benchmarks/cold_start.py --repeats 5 --output benchmarks/results/cold_start.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import REPO_DIR
+
+API_DIR = os.path.join(REPO_DIR, 'src', 'api')
+SCENARIOS = ['api-cbm', 'api-pkl', 'api-npz', 'predict', 'trainer']
+
+
+def run_scenario(scenario):
+    """Run `scenario` inside this (fresh) process and time its steps."""
+    import numpy as np
+
+    timings = {}
+    start = time.perf_counter()
+    if scenario.startswith('api-'):
+        from api import main
+        timings['import_seconds'] = time.perf_counter() - start
+        handle = main.registry.get()
+        timings['load_seconds'] = time.perf_counter() - start - timings['import_seconds']
+        input_data = main._raw_encoder(handle).encode([main.RawChurnRecord(REGION='DAKAR', MONTANT=1000.0)])
+        handle.predict_proba(input_data)
+    elif scenario == 'predict':
+        import predict
+        from models.serialization import load_model
+        timings['import_seconds'] = time.perf_counter() - start
+        model = load_model(os.path.join(API_DIR, 'Catboost.cbm'))
+        timings['load_seconds'] = time.perf_counter() - start - timings['import_seconds']
+        model.predict_proba(np.zeros((1, len(model.feature_names_))))
+    else:
+        import models.trainer  # noqa: F401
+        timings['import_seconds'] = time.perf_counter() - start
+    timings['in_process_seconds'] = time.perf_counter() - start
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure start-to-first-prediction time of fresh processes.")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', default=None, help="Write the results as JSON")
+    parser.add_argument('--child', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child)))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='churn-cold-start-') as work_dir:
+        for scenario in args.scenarios:
+            env = dict(os.environ, PYTHONPATH=os.path.join(REPO_DIR, 'src'))
+            if scenario.startswith('api-'):
+                # A model directory holding only the format under test.
+                model_dir = os.path.join(work_dir, scenario)
+                os.makedirs(model_dir, exist_ok=True)
+                shutil.copy(os.path.join(API_DIR, f"Catboost.{scenario.split('-')[1]}"), model_dir)
+                env.update(CHURN_MODEL_DIRS=model_dir, CHURN_PREPROCESSOR_PATH=os.path.join(work_dir, 'none.json'),
+                           CHURN_MODEL_BACKEND='numpy' if scenario == 'api-npz' else 'catboost')
+
+            runs = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', scenario],
+                                        check=True, capture_output=True, text=True, env=env).stdout
+                total = time.perf_counter() - start
+                runs.append({'total_seconds': total, **json.loads(output.strip().splitlines()[-1])})
+
+            results[scenario] = {
+                key: statistics.median(run[key] for run in runs) for key in runs[0]
+            }
+            results[scenario]['runs'] = runs
+            summary = results[scenario]
+            print(f"{scenario:10s} total {summary['total_seconds']:6.2f}s  "
+                  f"(import {summary['import_seconds']:.2f}s, load {summary.get('load_seconds', 0.0):.3f}s)")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Peak memory and runtime of `preprocess` in each of its modes.
+
+Every mode runs in a fresh subprocess, so each peak RSS is its own and not
+inflated by an earlier mode. 'legacy' is the original concat/fillna/get_dummies
+implementation, kept here as the reference point.
+
+    python benchmarks/preprocess_memory.py --raw-dir data/synthetic --output benchmarks/results/preprocess_memory.json
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import write_results
+from utils.instrumentation import peak_rss_mb, reset_peak_rss
+
+MODES = {
+    'legacy': {},
+    'dummies': {'encoding': 'dummies'},
+    'lean': {'encoding': 'dummies', 'lean': True},
+    'native': {'encoding': 'native'},
+    'native-lean': {'encoding': 'native', 'lean': True},
+}
+
+
+def legacy_preprocess(train, test):
+    import numpy as np
+    import pandas as pd
+
+    churn = train['CHURN']
+    train = train.drop('CHURN', axis=1)
+    data = pd.concat([train, test], sort=False)
+    data = data.drop(['ZONE1', 'ZONE2'], axis=1, errors='ignore')
+    for col in data.select_dtypes(include=['object', 'category']).columns:
+        data[col] = data[col].astype(object).fillna(f'Missing_{col}')
+    for col in data.select_dtypes(include=[np.number]).columns:
+        data[col] = data[col].fillna(data[col].median())
+    data = data.drop(['MRG'], axis=1, errors='ignore')
+    data = data.drop(['REVENUE'], axis=1, errors='ignore')
+    data = pd.get_dummies(data, columns=['REGION', 'TOP_PACK', 'TENURE'], drop_first=True)
+    data = data.drop('user_id', axis=1)
+    return data.iloc[:len(churn), :], data.iloc[len(churn):, :], churn
+
+
+def run_mode(mode, raw_dir):
+    """Preprocess `raw_dir` in `mode` inside this process and measure it."""
+    from data.ingest_data import load_data
+    from preprocess.preprocess import preprocess
+
+    train, test, _ = load_data(raw_dir)
+    gc.collect()
+    reset_peak_rss()
+    loaded_rss_mb = peak_rss_mb()
+
+    start = time.perf_counter()
+    if mode == 'legacy':
+        train_clean, test_clean, _ = legacy_preprocess(train, test)
+    else:
+        train_clean, test_clean, _ = preprocess(train, test, **MODES[mode])
+    wall_seconds = time.perf_counter() - start
+
+    peak_mb = peak_rss_mb()
+    return {
+        'mode': mode,
+        'rows': len(train) + len(test),
+        'wall_seconds': wall_seconds,
+        'loaded_rss_mb': loaded_rss_mb,
+        'peak_rss_mb': peak_mb,
+        'preprocess_rss_mb': peak_mb - loaded_rss_mb,
+        'output_mb': (train_clean.memory_usage(deep=True).sum() + test_clean.memory_usage(deep=True).sum()) / 2**20,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure peak RSS and runtime of each preprocess mode.")
+    parser.add_argument('--raw-dir', default='data/raw', help="Directory holding train.csv and test.csv")
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--output', default=None, help="Write the results as JSON")
+    parser.add_argument('--child', choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, args.raw_dir)))
+        return
+
+    results = []
+    for mode in args.modes:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--raw-dir', args.raw_dir,
+                                 '--child', mode], check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{mode:12s} {result['wall_seconds']:8.2f}s  peak {result['peak_rss_mb']:9.1f} MB  "
+              f"(+{result['preprocess_rss_mb']:.1f} MB over loaded data)  output {result['output_mb']:.1f} MB")
+
+    if args.output:
+        write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+End-to-end performance benchmarks on synthetic data.
+
+Generates (or reuses) a synthetic dataset and measures:
+
+- `load_data`: read time, peak memory and rows/second;
+- `preprocess`: each encoding mode, with and without engineered features;
+- `train_model`: fit/predict time, memory and validation metrics per model;
+- batch scoring (`predict.score_file`) with one and with all worker processes;
+- the API: latency percentiles and throughput of `/predict` and `/predict/raw`
+  under concurrent in-process load.
+
+Results are written as JSON (by default `benchmarks/results/<revision>.json`),
+so runs on different commits can be compared with `--baseline`.
+
+    python benchmarks/run_benchmarks.py --rows 1000000
+    python benchmarks/run_benchmarks.py --rows 1000000 --baseline benchmarks/results/abc1234.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from common import REPO_DIR, RESULTS_DIR, environment, write_results
+from synthetic import write_dataset
+from utils.instrumentation import measure
+
+SECTIONS = ['load', 'preprocess', 'train', 'score', 'api']
+PREPROCESS_MODES = {
+    'dummies': {'encoding': 'dummies'},
+    'lean': {'encoding': 'dummies', 'lean': True},
+    'native': {'encoding': 'native'},
+    'features': {'encoding': 'dummies', 'features': True},
+}
+
+
+def bench_load(data_dir):
+    from data.ingest_data import load_data
+
+    with measure() as m:
+        train, test, _ = load_data(data_dir)
+    rows = len(train) + len(test)
+    return {**m, 'rows': rows, 'rows_per_second': rows / m['wall_seconds']}, train, test
+
+
+def bench_preprocess(train, test):
+    from preprocess.features import engineer_features
+    from preprocess.preprocess import ChurnPreprocessor, preprocess
+
+    preprocessor = ChurnPreprocessor().fit(train, test)
+    with_features = ChurnPreprocessor(features=True).fit(train, test)
+    results = {}
+    for mode, kwargs in PREPROCESS_MODES.items():
+        kwargs = dict(kwargs)
+        fitted = with_features if kwargs.pop('features', False) else preprocessor
+        with measure() as m:
+            train_clean, test_clean, _ = preprocess(train, test, fitted, **kwargs)
+        rows = len(train_clean) + len(test_clean)
+        results[mode] = {**m, 'rows_per_second': rows / m['wall_seconds'],
+                         'output_mb': (train_clean.memory_usage().sum() + test_clean.memory_usage().sum()) / 2**20}
+        del train_clean, test_clean
+
+    # The feature-engineering step on its own, on the imputed numeric block.
+    numeric = preprocessor.transform(train)[preprocessor.numeric_columns].to_numpy()
+    with measure() as m:
+        engineer_features(numeric, preprocessor.numeric_columns)
+    results['engineer_features'] = {**m, 'rows_per_second': len(numeric) / m['wall_seconds']}
+    return results, preprocessor
+
+
+def bench_train(train, test, preprocessor, work_dir, n_jobs, parallel):
+    from preprocess.preprocess import preprocess
+    from models.trainer import train_model
+
+    train_clean, _, churn = preprocess(train, test, preprocessor)
+    with measure() as m:
+        summary = train_model(train_clean, churn, parallel=parallel, n_jobs=n_jobs, summary_path=None,
+                              model_dir=os.path.join(work_dir, 'models'))
+    return {'total': m, 'models': summary}
+
+
+def bench_score(data_dir, work_dir, chunksize, workers):
+    from predict import score_file
+
+    results = {}
+    for n_workers in sorted({1, workers}):
+        with measure() as m:
+            rows = score_file(os.path.join(data_dir, 'test.csv'),
+                              os.path.join(work_dir, 'models', 'Catboost.pkl'),
+                              os.path.join(work_dir, 'preprocessor.json'),
+                              os.path.join(work_dir, 'predictions.csv'),
+                              chunksize=chunksize, workers=n_workers)
+        results[f'workers_{n_workers}'] = {**m, 'rows': rows, 'rows_per_second': rows / m['wall_seconds']}
+    return results
+
+
+def _latency_summary(latencies, elapsed):
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'throughput_rps': len(latencies) / elapsed,
+        'mean_ms': float(latencies_ms.mean()),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p90_ms': float(np.percentile(latencies_ms, 90)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'max_ms': float(latencies_ms.max()),
+    }
+
+
+async def _load_test(client, path, payloads, concurrency, n_requests):
+    latencies = []
+    next_index = iter(range(n_requests))
+
+    async def worker():
+        for i in next_index:
+            start = time.perf_counter()
+            response = await client.post(path, json=payloads[i % len(payloads)])
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _latency_summary(latencies, time.perf_counter() - start)
+
+
+def bench_api(data_dir, work_dir, concurrency_levels, n_requests, microbatch):
+    import httpx
+    import pandas as pd
+
+    # The app reads its configuration at import. /predict takes the feature
+    # layout of the shipped model, so the registry serves that one; the
+    # preprocessor fitted on the synthetic data provides the medians.
+    os.environ['CHURN_MODEL_DIRS'] = os.path.join(REPO_DIR, 'src', 'api')
+    os.environ['CHURN_PREPROCESSOR_PATH'] = os.path.join(work_dir, 'preprocessor.json')
+    os.environ['CHURN_CACHE_SIZE'] = '0'
+    os.environ['CHURN_MICROBATCH'] = '1' if microbatch else '0'
+    os.environ['CHURN_PREDICTION_LOG'] = os.path.join(work_dir, 'requests.jsonl')
+    from api import main
+
+    sample = pd.read_csv(os.path.join(data_dir, 'test.csv'), nrows=1000)
+    raw_payloads = [
+        {col: (None if pd.isna(value) else value) for col, value in record.items()
+         if col in main.RawChurnRecord.model_fields}
+        for record in sample.to_dict('records')
+    ]
+    encoder = main._raw_encoder(main.registry.get())
+    encoded = encoder.encode([main.RawChurnRecord(**payload) for payload in raw_payloads])
+    feature_payloads = [dict(zip(main.FEATURE_COLUMNS, row.tolist())) for row in encoded]
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        results = {}
+        async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+            for path, payloads in [('/predict', feature_payloads), ('/predict/raw', raw_payloads)]:
+                await _load_test(client, path, payloads, 4, 50)  # warm-up
+                results[path] = {
+                    f'concurrency_{concurrency}': await _load_test(client, path, payloads, concurrency, n_requests)
+                    for concurrency in concurrency_levels
+                }
+        return results
+
+    return {'microbatch': microbatch, **asyncio.run(run())}
+
+
+def _flatten(results, prefix=''):
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            yield from _flatten(value, name + '.')
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(results, baseline):
+    """Print the relative change of every time/throughput metric against a baseline run."""
+    old = dict(_flatten(baseline))
+    print(f"\nChange against {baseline.get('environment', {}).get('revision', 'baseline')}:")
+    for name, value in _flatten(results):
+        metric = name.rsplit('.', 1)[-1]
+        if name not in old or not old[name] or not (metric.endswith(('seconds', '_ms', 'per_second', '_rps'))):
+            continue
+        print(f"  {name:70s} {old[name]:12.4f} -> {value:12.4f} ({(value - old[name]) / old[name]:+.1%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the churn pipeline and API on synthetic data.")
+    parser.add_argument('--rows', type=int, default=200_000, help="Training rows of the synthetic dataset")
+    parser.add_argument('--data-dir', default=None,
+                        help="Existing raw data directory; a synthetic one is generated when omitted")
+    parser.add_argument('--sections', nargs='+', choices=SECTIONS, default=SECTIONS)
+    parser.add_argument('--n-jobs', type=int, default=None, help="Core budget for training and scoring")
+    parser.add_argument('--parallel', action='store_true', help="Train the models concurrently")
+    parser.add_argument('--chunksize', type=int, default=200_000, help="Batch scoring chunk size")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32],
+                        help="Concurrent clients for the API benchmark")
+    parser.add_argument('--requests', type=int, default=2000, help="Requests per API concurrency level")
+    parser.add_argument('--microbatch', action='store_true', help="Enable API micro-batching")
+    parser.add_argument('--output', default=None, help="Result file (default: benchmarks/results/<revision>.json)")
+    parser.add_argument('--baseline', default=None, help="Earlier result file to compare against")
+    args = parser.parse_args(argv)
+
+    env = environment()
+    results = {'environment': env, 'parameters': vars(args)}
+    sections = set(args.sections)
+    n_jobs = args.n_jobs or os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory(prefix='churn-bench-') as work_dir:
+        data_dir = args.data_dir
+        if data_dir is None:
+            data_dir = os.path.join(work_dir, 'raw')
+            with measure() as m:
+                write_dataset(data_dir, args.rows)
+            results['generate'] = m
+            print(f"Generated {args.rows} synthetic rows in {m['wall_seconds']:.1f}s")
+
+        # Every section needs the loaded data and the fitted preprocessor, so
+        # they are always produced; only the selected sections are recorded.
+        load_result, train, test = bench_load(data_dir)
+        preprocess_results, preprocessor = bench_preprocess(train, test)
+        preprocessor.save(os.path.join(work_dir, 'preprocessor.json'))
+        if 'load' in sections:
+            results['load_data'] = load_result
+            print(f"load_data: {load_result['wall_seconds']:.2f}s")
+        if 'preprocess' in sections:
+            results['preprocess'] = preprocess_results
+            for mode, result in preprocess_results.items():
+                print(f"preprocess[{mode}]: {result['wall_seconds']:.2f}s")
+
+        # Batch scoring uses the CatBoost model trained here.
+        if sections & {'train', 'score'}:
+            results['train'] = bench_train(train, test, preprocessor, work_dir, n_jobs, args.parallel)
+            for model_name, result in results['train']['models'].items():
+                print(f"train[{model_name}]: fit {result['fit_seconds']:.2f}s, log loss {result['log_loss']:.4f}")
+        del train, test
+
+        if 'score' in sections:
+            results['score'] = bench_score(data_dir, work_dir, args.chunksize, n_jobs)
+            for name, result in results['score'].items():
+                print(f"score[{name}]: {result['rows_per_second']:,.0f} rows/s")
+
+        if 'api' in sections:
+            results['api'] = bench_api(data_dir, work_dir, args.concurrency, args.requests, args.microbatch)
+            for path in ['/predict', '/predict/raw']:
+                for level, result in results['api'][path].items():
+                    print(f"api[{path} {level}]: p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, "
+                          f"{result['throughput_rps']:.0f} req/s")
+
+    write_results(results, args.output or os.path.join(RESULTS_DIR, f"{env['revision']}.json"))
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Throughput and per-worker memory of multi-process serving.
+
+For every worker count, starts the API as a real HTTP server and drives it with
+client processes posting `/predict/raw` for a fixed time, then reads the memory
+of every worker from /proc (Linux only):
+
+- `prefork`: `src/api/serve.py`, which loads the model once and forks workers
+  that share its pages copy-on-write;
+- `uvicorn`: `uvicorn --workers N`, where every worker imports the API and
+  loads its own copy of the model.
+
+`private_mb` is the memory only that worker uses; `pss_mb` splits shared pages
+evenly between the processes that map them.
+
+    python benchmarks/serving_workers.py --workers 1 2 4 --output benchmarks/results/serving_workers.json
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from common import REPO_DIR, environment, write_results
+
+SERVERS = ['prefork', 'uvicorn']
+RECORD = json.dumps({'REGION': 'DAKAR', 'TENURE': 'K > 24 month', 'MONTANT': 1000.0, 'REGULARITY': 45}).encode()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(server, workers, port):
+    env = dict(os.environ, PYTHONPATH=os.path.join(REPO_DIR, 'src'), CHURN_PREDICTION_LOG='', CHURN_CACHE_SIZE='0')
+    if server == 'prefork':
+        command = [sys.executable, os.path.join(REPO_DIR, 'src', 'api', 'serve.py'), '--workers', str(workers),
+                   '--port', str(port), '--log-level', 'warning']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'api.main:app', '--workers', str(workers),
+                   '--port', str(port), '--log-level', 'warning']
+    return subprocess.Popen(command, env=env, cwd=REPO_DIR, stdout=subprocess.DEVNULL)
+
+
+def wait_until_ready(port, timeout=120.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/models')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start within {timeout}s")
+
+
+def run_client(port, seconds):
+    """Post records over one keep-alive connection for `seconds`; returns the number of responses."""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        connection.request('POST', '/predict/raw', body=RECORD, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status == 200:
+            count += 1
+    return count
+
+
+def worker_pids(pid):
+    """All descendants of `pid`."""
+    pids = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        for child in open(f'/proc/{pid}/task/{task}/children').read().split():
+            pids.append(int(child))
+            pids.extend(worker_pids(int(child)))
+    return pids
+
+
+def memory_mb(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss_mb': fields.get('Rss', 0.0),
+        'pss_mb': fields.get('Pss', 0.0),
+        'private_mb': fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0),
+    }
+
+
+def measure(server, workers, clients, seconds):
+    port = free_port()
+    process = start_server(server, workers, port)
+    try:
+        wait_until_ready(port)
+        # Warm up every worker (lazy model loads in the uvicorn workers) before timing.
+        with ProcessPoolExecutor(clients) as pool:
+            list(pool.map(run_client, [port] * clients, [1.0] * clients))
+            start = time.perf_counter()
+            responses = sum(pool.map(run_client, [port] * clients, [seconds] * clients))
+            elapsed = time.perf_counter() - start
+        # A single uvicorn worker runs in the server process itself.
+        memory = [memory_mb(pid) for pid in worker_pids(process.pid) or [process.pid]]
+        # Only processes holding the model, not uvicorn's small helper processes.
+        memory = sorted(memory, key=lambda m: m['rss_mb'], reverse=True)[:workers]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(30)
+
+    return {
+        'server': server,
+        'workers': workers,
+        'clients': clients,
+        'requests_per_second': responses / elapsed,
+        'worker_rss_mb': sum(m['rss_mb'] for m in memory) / len(memory),
+        'worker_pss_mb': sum(m['pss_mb'] for m in memory) / len(memory),
+        'worker_private_mb': sum(m['private_mb'] for m in memory) / len(memory),
+        'total_pss_mb': sum(m['pss_mb'] for m in memory),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure QPS and per-worker memory of multi-process serving.")
+    parser.add_argument('--servers', nargs='+', choices=SERVERS, default=SERVERS)
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument('--clients-per-worker', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10.0, help="Load duration per configuration")
+    parser.add_argument('--output', default=None, help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {'environment': environment(), 'runs': []}
+    for server in args.servers:
+        for workers in args.workers:
+            result = measure(server, workers, workers * args.clients_per_worker, args.seconds)
+            results['runs'].append(result)
+            print(f"{server:8s} {workers:2d} workers  {result['requests_per_second']:8.1f} req/s  "
+                  f"per worker: rss {result['worker_rss_mb']:6.1f} MB, pss {result['worker_pss_mb']:6.1f} MB, "
+                  f"private {result['worker_private_mb']:6.1f} MB")
+
+    if args.output:
+        write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
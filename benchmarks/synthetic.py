@@ -0,0 +1,339 @@
+"""
+Synthetic Expresso churn data for benchmarks.
+
+Rows follow the schema of `src/data/raw/VariableDefinitions.csv`: the same
+columns, the real category values, and missing-value rates, category
+frequencies and numeric quantiles taken from the EDA notebook. Subscribers
+without recent activity have all their usage columns missing at once, as in
+the real data, and churn far more often. Files are written in chunks, so tens
+of millions of rows can be generated in constant memory.
+
+    python benchmarks/synthetic.py --rows 2000000 --output-dir data/synthetic
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Column order of the raw train file; the test file has no CHURN column.
+COLUMNS = [
+    'user_id', 'REGION', 'TENURE', 'MONTANT', 'FREQUENCE_RECH', 'REVENUE', 'ARPU_SEGMENT', 'FREQUENCE',
+    'DATA_VOLUME', 'ON_NET', 'ORANGE', 'TIGO', 'ZONE1', 'ZONE2', 'MRG', 'REGULARITY', 'TOP_PACK',
+    'FREQ_TOP_PACK', 'CHURN',
+]
+
+# Ratio of test to train rows in the competition data (380,127 / 2,154,048).
+TEST_FRACTION = 0.1765
+
+# Share of subscribers with no recharge/revenue activity at all; every usage
+# column of theirs is missing.
+INACTIVE_RATE = 0.337
+
+REGION_VALUES = [
+    'DAKAR', 'DIOURBEL', 'FATICK', 'KAFFRINE', 'KAOLACK', 'KEDOUGOU', 'KOLDA', 'LOUGA', 'MATAM',
+    'SAINT-LOUIS', 'SEDHIOU', 'TAMBACOUNDA', 'THIES', 'ZIGUINCHOR',
+]
+TENURE_VALUES = [
+    'K > 24 month', 'D 3-6 month', 'E 6-9 month', 'F 9-12 month', 'G 12-15 month', 'H 15-18 month',
+    'I 18-21 month', 'J 21-24 month',
+]
+TOP_PACK_VALUES = [
+    '1500=Unlimited7Day',
+    '150=unlimited pilot auto',
+    '200=Unlimited1Day',
+    '200=unlimited pilot auto',
+    '200F=10mnOnNetValid1H',
+    '301765007',
+    '305155009',
+    '500=Unlimited3Day',
+    'APANews_monthly',
+    'APANews_weekly',
+    'All-net 1000=5000;5d',
+    'All-net 1000F=(3000F On+3000F Off);5d',
+    'All-net 300=600;2d',
+    'All-net 5000= 20000off+20000on;30d',
+    'All-net 500= 4000off+4000on;24H',
+    'All-net 500F =2000F_AllNet_Unlimited',
+    'All-net 500F=1250F_AllNet_1250_Onnet;48h',
+    'All-net 500F=2000F;5d',
+    'All-net 500F=4000F ; 5d',
+    'All-net 600F= 3000F ;5d',
+    'CVM_100F_unlimited',
+    'CVM_100f=200 MB',
+    'CVM_100f=500 onNet',
+    'CVM_150F_unlimited',
+    'CVM_200f=400MB',
+    'CVM_500f=2GB',
+    'CVM_On-net 1300f=12500',
+    'CVM_On-net 400f=2200F',
+    'CVM_on-net bundle 500=5000',
+    'Data: 100 F=40MB,24H',
+    'Data: 200 F=100MB,24H',
+    'Data: 200F=1GB,24H',
+    'Data: 490F=Night,00H-08H',
+    'Data:1000F=2GB,30d',
+    'Data:1000F=5GB,7d',
+    'Data:1000F=700MB,7d',
+    'Data:1500F=3GB,30D',
+    'Data:1500F=SPPackage1,30d',
+    'Data:150F=SPPackage1,24H',
+    'Data:200F=Unlimited,24H',
+    'Data:3000F=10GB,30d',
+    'Data:300F=100MB,2d',
+    'Data:30Go_V 30_Days',
+    'Data:490F=1GB,7d',
+    'Data:500F=2GB,24H',
+    'Data:50F=30MB_24H',
+    'Data:700F=1.5GB,7d',
+    'Data:700F=SPPackage1,7d',
+    'Data:DailyCycle_Pilot_1.5GB',
+    'Data:New-GPRS_PKG_1500F',
+    'Data:OneTime_Pilot_1.5GB',
+    'DataPack_Incoming',
+    'Data_EVC_2Go24H',
+    'Data_Mifi_10Go',
+    'Data_Mifi_10Go_Monthly',
+    'Data_Mifi_20Go',
+    'ESN_POSTPAID_CLASSIC_RENT',
+    'EVC_1000=6000 F',
+    'EVC_100Mo',
+    'EVC_1Go',
+    'EVC_4900=12000F',
+    'EVC_500=2000F',
+    'EVC_700Mo',
+    'EVC_JOKKO30',
+    'EVC_Jokko_Weekly',
+    'EVC_MEGA10000F',
+    'EVC_PACK_2.2Go',
+    'FIFA_TS_daily',
+    'FIFA_TS_monthly',
+    'FIFA_TS_weekly',
+    'FNF2 ( JAPPANTE)',
+    'FNF_Youth_ESN',
+    'Facebook_MIX_2D',
+    'GPRS_3000Equal10GPORTAL',
+    'GPRS_5Go_7D_PORTAL',
+    'GPRS_BKG_1000F MIFI',
+    'GPRS_PKG_5GO_ILLIMITE',
+    'Go-NetPro-4 Go',
+    'IVR Echat_Daily_50F',
+    'IVR Echat_Monthly_500F',
+    'IVR Echat_Weekly_200F',
+    'Incoming_Bonus_woma',
+    'Internat: 1000F_Zone_1;24H\t\t',
+    'Internat: 1000F_Zone_3;24h\t\t',
+    'Internat: 2000F_Zone_2;24H\t\t',
+    'Jokko_Daily',
+    'Jokko_Monthly',
+    'Jokko_Weekly',
+    'Jokko_promo',
+    'MIXT: 200mnoff net _unl on net _5Go;30d',
+    'MIXT: 390F=04HOn-net_400SMS_400 Mo;4h\t',
+    'MIXT: 4900F= 10H on net_1,5Go ;30d',
+    'MIXT: 5000F=80Konnet_20Koffnet_250Mo;30d\t\t',
+    'MIXT: 500F=75(SMS, ONNET, Mo)_1000FAllNet;24h\t\t',
+    'MIXT: 590F=02H_On-net_200SMS_200 Mo;24h\t\t',
+    'MIXT:10000F=10hAllnet_3Go_1h_Zone3;30d\t\t',
+    'MIXT:1000F=4250 Off net _ 4250F On net _100Mo; 5d',
+    'MIXT:500F= 2500F on net _2500F off net;2d',
+    'MROMO_TIMWES_OneDAY',
+    'MROMO_TIMWES_RENEW',
+    'MegaChrono_3000F=12500F TOUS RESEAUX',
+    'Mixt 250F=Unlimited_call24H',
+    'Mixt : 500F=2500Fonnet_2500Foffnet ;5d',
+    'NEW_CLIR_PERMANENT_LIBERTE_MOBILE',
+    'NEW_CLIR_TEMPALLOWED_LIBERTE_MOBILE',
+    'NEW_CLIR_TEMPRESTRICTED_LIBERTE_MOBILE',
+    'New_YAKALMA_4_ALL',
+    'On net 200F= 3000F_10Mo ;24H',
+    'On net 200F=Unlimited _call24H',
+    'On-net 1000F=10MilF;10d',
+    'On-net 2000f_One_Month_100H; 30d',
+    'On-net 200F=60mn;1d',
+    'On-net 300F=1800F;3d',
+    'On-net 500=4000,10d',
+    'On-net 500F_FNF;3d',
+    'Package3_Monthly',
+    'Pilot_Youth1_290',
+    'Pilot_Youth4_490',
+    'Postpaid FORFAIT 10H Package',
+    'SMS Max',
+    'SUPERMAGIK_1000',
+    'SUPERMAGIK_5000',
+    'Staff_CPE_Rent',
+    'TelmunCRBT_daily',
+    'Twter_U2opia_Daily',
+    'Twter_U2opia_Monthly',
+    'Twter_U2opia_Weekly',
+    'VAS(IVR_Radio_Daily)',
+    'VAS(IVR_Radio_Monthly)',
+    'VAS(IVR_Radio_Weekly)',
+    'WIFI_ Family _10MBPS',
+    'WIFI_ Family _4MBPS',
+    'WIFI_Family_2MBPS',
+    'YMGX 100=1 hour FNF, 24H/1 month',
+    'YMGX on-net 100=700F, 24H',
+    'Yewouleen_PKG',
+    'pack_chinguitel_24h',
+    'pilot_offer4',
+    'pilot_offer5',
+    'pilot_offer6',
+    'pilot_offer7',
+]
+
+# column: (values, share of the most frequent (first) value, missing rate).
+# The remaining values follow a Zipf-like tail.
+CATEGORICAL_SPEC = {
+    'REGION': (REGION_VALUES, 0.393, 0.394),
+    'TENURE': (TENURE_VALUES, 0.949, 0.0),
+    'TOP_PACK': (TOP_PACK_VALUES, 0.254, 0.419),
+}
+
+# column: (25th, 50th, 75th percentile, share of zeros, missing rate, clip maximum).
+# Values are drawn from a log-normal matched to the quartiles of the non-zero part.
+NUMERIC_SPEC = {
+    'MONTANT': (1000, 3000, 7350, 0.0, 0.351, 470_000),
+    'FREQUENCE_RECH': (2, 7, 16, 0.0, 0.351, 133),
+    'REVENUE': (1000, 3000, 7368, 0.0, 0.337, 532_177),
+    'FREQUENCE': (3, 9, 20, 0.0, 0.337, 91),
+    'DATA_VOLUME': (150, 1500, 8000, 0.3, 0.492, 1_823_866),
+    'ON_NET': (8, 35, 180, 0.1, 0.365, 50_809),
+    'ORANGE': (9, 32, 105, 0.08, 0.416, 21_323),
+    'TIGO': (2, 7, 22, 0.05, 0.599, 4_174),
+    'ZONE1': (1, 2, 5, 0.3, 0.921, 4_792),
+    'ZONE2': (1, 3, 7, 0.25, 0.937, 3_697),
+    'FREQ_TOP_PACK': (2, 5, 12, 0.0, 0.419, 713),
+}
+
+# Columns that are missing together (one draw per group).
+MISSING_GROUPS = [
+    ['MONTANT', 'FREQUENCE_RECH'],
+    ['REVENUE', 'ARPU_SEGMENT', 'FREQUENCE'],
+    ['TOP_PACK', 'FREQ_TOP_PACK'],
+]
+
+_HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+def _user_ids(rng, n_rows):
+    # 40-character hex ids like the real (SHA-1) ones, built without a Python loop.
+    raw = rng.integers(0, 256, size=(n_rows, 20), dtype=np.uint8)
+    digits = np.empty((n_rows, 40), dtype=np.uint8)
+    digits[:, 0::2] = _HEX[raw >> 4]
+    digits[:, 1::2] = _HEX[raw & 15]
+    return digits.view('S40').ravel().astype(str)
+
+
+def _categorical(rng, values, top_share, n_rows):
+    tail = 1.0 / np.arange(1, len(values)) ** 1.2
+    probabilities = np.concatenate([[top_share], (1 - top_share) * tail / tail.sum()])
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=n_rows, p=probabilities)]
+
+
+def _numeric(rng, spec, n_rows):
+    q25, q50, q75, zero_rate, _, maximum = spec
+    sigma = (np.log(q75) - np.log(q25)) / 1.349
+    values = np.rint(rng.lognormal(np.log(q50), sigma, size=n_rows))
+    values[rng.random(n_rows) < zero_rate] = 0
+    return np.minimum(values, maximum)
+
+
+def _missing_rate(col):
+    spec = NUMERIC_SPEC.get(col)
+    return spec[4] if spec else CATEGORICAL_SPEC[col][2]
+
+
+def _missing(rng, rate, inactive):
+    # Inactive subscribers are always missing; the rest of the rate is spread over active ones.
+    conditional = max(0.0, (rate - INACTIVE_RATE) / (1 - INACTIVE_RATE))
+    return inactive | (rng.random(len(inactive)) < conditional)
+
+
+def generate_chunk(rng, n_rows, with_target=True):
+    """
+    Generate `n_rows` raw rows.
+
+    Args:
+        rng (np.random.Generator): Source of randomness.
+        n_rows (int): Number of rows.
+        with_target (bool): Include the CHURN column (train) or not (test).
+
+    Returns:
+        pd.DataFrame: Rows in the column order of the raw files.
+    """
+    inactive = rng.random(n_rows) < INACTIVE_RATE
+    data = {'user_id': _user_ids(rng, n_rows)}
+
+    for col, (values, top_share, _) in CATEGORICAL_SPEC.items():
+        data[col] = _categorical(rng, values, top_share, n_rows)
+    for col, spec in NUMERIC_SPEC.items():
+        data[col] = _numeric(rng, spec, n_rows)
+    data['ARPU_SEGMENT'] = np.rint(data['REVENUE'] / 3)
+    data['MRG'] = np.full(n_rows, 'NO', dtype=object)
+    # Active days over 90, skewed towards low values (mean around 28, at most 62).
+    data['REGULARITY'] = np.clip(np.rint(62 * rng.beta(0.8, 1.0, size=n_rows)), 1, 62).astype(np.int64)
+
+    grouped = {col for group in MISSING_GROUPS for col in group}
+    for group in MISSING_GROUPS:
+        mask = _missing(rng, _missing_rate(group[0]), inactive)
+        for col in group:
+            data[col] = np.where(mask, None if col in CATEGORICAL_SPEC else np.nan, data[col])
+    for col in NUMERIC_SPEC:
+        if col not in grouped:
+            data[col] = np.where(_missing(rng, _missing_rate(col), inactive), np.nan, data[col])
+    # The region is unrelated to activity.
+    data['REGION'] = np.where(rng.random(n_rows) < _missing_rate('REGION'), None, data['REGION'])
+
+    if with_target:
+        # Inactivity and irregular use drive churn; the overall rate is about 19%.
+        logit = -3.6 + 3.6 * inactive - 0.035 * (data['REGULARITY'] - 28)
+        data['CHURN'] = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(np.int64)
+
+    columns = COLUMNS if with_target else COLUMNS[:-1]
+    return pd.DataFrame(data, columns=columns)
+
+
+def write_dataset(output_dir, n_train, n_test=None, chunksize=1_000_000, seed=42):
+    """
+    Write `train.csv`, `test.csv` and `SampleSubmission.csv` to `output_dir`,
+    in the layout `data.ingest_data.load_data` reads.
+
+    Args:
+        output_dir (str): Target directory.
+        n_train (int): Number of training rows.
+        n_test (int, optional): Number of test rows. Defaults to the
+            competition's test/train ratio.
+        chunksize (int): Rows generated and written at a time.
+        seed (int): Seed, so the same arguments always produce the same files.
+    """
+    n_test = int(n_train * TEST_FRACTION) if n_test is None else n_test
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    for name, n_rows, with_target in [('train', n_train, True), ('test', n_test, False)]:
+        path = os.path.join(output_dir, f'{name}.csv')
+        submission = os.path.join(output_dir, 'SampleSubmission.csv')
+        for start in range(0, n_rows, chunksize):
+            chunk = generate_chunk(rng, min(chunksize, n_rows - start), with_target)
+            chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+            if name == 'test':
+                chunk[['user_id']].assign(CHURN=0).to_csv(submission, mode='w' if start == 0 else 'a',
+                                                          header=start == 0, index=False)
+    return output_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Expresso churn files.")
+    parser.add_argument('--rows', type=int, default=100_000, help="Number of training rows")
+    parser.add_argument('--test-rows', type=int, default=None, help="Number of test rows")
+    parser.add_argument('--output-dir', default='data/synthetic')
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    write_dataset(args.output_dir, args.rows, args.test_rows, args.chunksize, args.seed)
+    print(f"Wrote synthetic data to {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Latency and throughput of the two CatBoost scoring backends.
+
+Scores batches of increasing size with the CatBoost runtime (`.cbm`) and with
+the NumPy oblivious-tree evaluator (`.npz`, see `models.oblivious`), and checks
+that both give the same probabilities. Rows are taken from `--raw-dir`,
+preprocessed with one-hot dummies and aligned to the model's features.
+
+The shipped model never sees NaN, so parity is also checked on small models
+trained with each of CatBoost's NaN modes on the same rows with NaNs injected.
+
+    python benchmarks/tree_backends.py --raw-dir data/synthetic --output benchmarks/results/tree_backends.json
+"""
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+
+from common import REPO_DIR, environment, write_results
+
+API_DIR = os.path.join(REPO_DIR, 'src', 'api')
+BATCH_SIZES = [1, 10, 100, 1000, 20000]
+
+
+def load_features(raw_dir, feature_names, n_rows):
+    """Up to `n_rows` preprocessed training rows, in the model's column order."""
+    from data.ingest_data import load_data
+    from preprocess.preprocess import preprocess
+
+    train, test, _ = load_data(raw_dir)
+    train_clean, _, _ = preprocess(train.head(n_rows), test.head(1))
+    features = train_clean.reindex(columns=feature_names, fill_value=0)
+    return np.ascontiguousarray(features.to_numpy(dtype=np.float64))
+
+
+def nan_mode_parity(X, nan_modes=('Min', 'Max'), seed=0):
+    """Max |catboost - numpy| of a small model per `nan_mode`, on `X` with a fifth of the values NaN."""
+    from catboost import CatBoostClassifier
+    from models.oblivious import ObliviousTreeModel
+
+    rng = np.random.default_rng(seed)
+    X = X.copy()
+    X[rng.random(X.shape) < 0.2] = np.nan
+    # A target that depends on where the NaNs are, so the NaN branches matter.
+    y = (np.isnan(X[:, 0]) | (np.nan_to_num(X[:, 1], nan=-np.inf) > np.nanmedian(X[:, 1]))).astype(int)
+    diffs = {}
+    for nan_mode in nan_modes:
+        model = CatBoostClassifier(iterations=50, depth=4, nan_mode=nan_mode, verbose=0,
+                                   allow_writing_files=False).fit(X, y)
+        diffs[nan_mode] = float(np.abs(model.predict_proba(X)
+                                       - ObliviousTreeModel.from_catboost(model).predict_proba(X)).max())
+    return diffs
+
+
+def time_batches(model, X, batch_size, min_seconds):
+    """Median seconds per `predict_proba` call on consecutive batches of `batch_size` rows."""
+    timings = []
+    start = 0
+    deadline = time.perf_counter() + min_seconds
+    while time.perf_counter() < deadline or len(timings) < 3:
+        if start + batch_size > len(X):
+            start = 0
+        batch = X[start:start + batch_size]
+        begin = time.perf_counter()
+        model.predict_proba(batch)
+        timings.append(time.perf_counter() - begin)
+        start += batch_size
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the CatBoost and NumPy scoring backends.")
+    parser.add_argument('--raw-dir', default='data/raw', help="Directory holding train.csv and test.csv")
+    parser.add_argument('--model', default=os.path.join(API_DIR, 'Catboost.cbm'),
+                        help="CatBoost model (.cbm or .pkl); converted for the NumPy backend")
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=BATCH_SIZES)
+    parser.add_argument('--min-seconds', type=float, default=1.0, help="Time spent per batch size and backend")
+    parser.add_argument('--output', default=None, help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    from models.serialization import load_model
+
+    backends = {
+        'catboost': load_model(args.model),
+        'numpy': load_model(args.model, backend='numpy'),
+    }
+    X = load_features(args.raw_dir, backends['catboost'].feature_names_, max(args.batch_sizes))
+    batch_sizes = [size for size in args.batch_sizes if size <= len(X)]
+
+    max_abs_diff = float(np.abs(backends['catboost'].predict_proba(X) - backends['numpy'].predict_proba(X)).max())
+    print(f"{len(X)} rows, max |catboost - numpy| = {max_abs_diff:.2e}")
+    nan_mode_diffs = nan_mode_parity(X)
+    for nan_mode, diff in nan_mode_diffs.items():
+        print(f"nan_mode={nan_mode}: max |catboost - numpy| = {diff:.2e}")
+
+    results = {'environment': environment(), 'rows': len(X), 'max_abs_diff': max_abs_diff,
+               'nan_mode_max_abs_diff': nan_mode_diffs, 'batches': []}
+    for batch_size in batch_sizes:
+        row = {'batch_size': batch_size}
+        for name, model in backends.items():
+            seconds = time_batches(model, X, batch_size, args.min_seconds)
+            row[f'{name}_ms'] = seconds * 1000
+            row[f'{name}_rows_per_second'] = batch_size / seconds
+        results['batches'].append(row)
+        print(f"{batch_size:6d} rows  catboost {row['catboost_ms']:8.3f} ms ({row['catboost_rows_per_second']:9.0f} rows/s)  "
+              f"numpy {row['numpy_ms']:8.3f} ms ({row['numpy_rows_per_second']:9.0f} rows/s)")
+
+    if args.output:
+        write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
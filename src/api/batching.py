@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one vectorized call.
+
+    Rows submitted within `max_wait_ms` of the first row of a batch (or until
+    `max_batch_size` rows are waiting) are stacked into one matrix per `key`
+    and scored by `score_fn(key, matrix)` on a worker thread, so rows for
+    different models are never mixed. Each caller gets back its own probability.
+    The background task starts on the first submission, inside the running
+    event loop.
+    """
+
+    def __init__(self, score_fn, max_batch_size=64, max_wait_ms=2.0, executor=None):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+        self._queue = None
+        self._task = None
+
+        self.requests = 0
+        self.batches = 0
+        self.max_seen_batch_size = 0
+        self.last_batch_size = 0
+        self._total_wait = 0.0
+
+    async def submit(self, row, key=None):
+        """
+        Queue one feature row and wait for its churn probability.
+
+        Args:
+            row (np.ndarray): 1D feature vector.
+            key: Passed to `score_fn` with the batch, e.g. the model to use.
+
+        Returns:
+            float: The churn probability of that row.
+        """
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((key, row, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            dispatched = time.perf_counter()
+            self.requests += len(batch)
+            self._total_wait += sum(dispatched - queued for _, _, _, queued in batch)
+
+            groups = {}
+            for key, row, future, _ in batch:
+                groups.setdefault(key, []).append((row, future))
+            for key, items in groups.items():
+                await self._score(loop, key, items)
+
+    async def _score(self, loop, key, items):
+        input_data = np.empty((len(items), len(items[0][0])), dtype=np.float64)
+        for i, (row, _) in enumerate(items):
+            input_data[i] = row
+
+        self.batches += 1
+        self.last_batch_size = len(items)
+        self.max_seen_batch_size = max(self.max_seen_batch_size, len(items))
+
+        try:
+            probabilities = await loop.run_in_executor(self.executor, self.score_fn, key, input_data)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), probability in zip(items, probabilities):
+            if not future.done():
+                future.set_result(float(probability))
+
+    def stats(self):
+        """Queue depth, batch sizes and mean queueing delay so far."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_seen_batch_size,
+            "last_batch_size": self.last_batch_size,
+            "mean_wait_ms": 1000.0 * self._total_wait / self.requests if self.requests else 0.0,
+            "max_batch_size_limit": self.max_batch_size,
+            "max_wait_ms": 1000.0 * self.max_wait,
+        }
@@ -0,0 +1,175 @@
+import numpy as np
+from operator import attrgetter
+
+from preprocess.features import FEATURE_NAMES, engineer_features
+
+# Columns of the raw Expresso record that the model consumes.
+NUMERIC_COLUMNS = [
+    "MONTANT", "FREQUENCE_RECH", "ARPU_SEGMENT", "FREQUENCE", "DATA_VOLUME",
+    "ON_NET", "ORANGE", "TIGO", "REGULARITY", "FREQ_TOP_PACK",
+]
+CATEGORICAL_COLUMNS = ["REGION", "TOP_PACK", "TENURE"]
+
+
+class RawEncoder:
+    """
+    Encodes raw records (REGION/TENURE/TOP_PACK as strings) into the one-hot
+    feature layout the model was trained on.
+
+    The category -> column-index table is built once from the model's feature
+    names, so the encoding can never drift from the column order produced by
+    `preprocess()`. A category without a column of its own (the level dropped
+    by `drop_first`, or one never seen in training) leaves all of its dummy
+    columns at zero. Missing numerics are replaced by `medians` when given
+    (usually those of the fitted `ChurnPreprocessor`) and left as NaN otherwise.
+    When the model was trained with engineered features, they are computed
+    from the imputed numerics by the same `engineer_features` as in training.
+
+    Models trained on the 'native' encoding have one column per categorical
+    instead of dummies. It holds the position of the value in the fitted
+    vocabulary (`categories`, those of the `ChurnPreprocessor`), or -1 when
+    the value was never seen, as `ChurnPreprocessor.transform` codes it.
+
+    `absent` is written to dummy columns that are off. XGBoost models fitted on
+    the sparse matrix of `sparse_from_native` saw those entries as missing, so
+    they are served NaN rather than 0.
+    """
+
+    def __init__(self, feature_names, medians=None, categories=None, absent=0.0):
+        self.feature_names = list(feature_names)
+        self.absent = absent
+        self.n_features = len(self.feature_names)
+        position = {name: i for i, name in enumerate(self.feature_names)}
+
+        self.numeric_index = np.array([position[col] for col in NUMERIC_COLUMNS], dtype=np.intp)
+        self._numeric_values = attrgetter(*NUMERIC_COLUMNS)
+        medians = medians or {}
+        self.numeric_medians = np.array([medians.get(col, np.nan) for col in NUMERIC_COLUMNS], dtype=np.float64)
+        self.feature_index = None
+        if all(name in position for name in FEATURE_NAMES):
+            self.feature_index = np.array([position[name] for name in FEATURE_NAMES], dtype=np.intp)
+
+        self.category_codes = {}
+        for col in CATEGORICAL_COLUMNS:
+            if col in position:
+                if not categories or col not in categories:
+                    raise ValueError(f"The model takes {col} as integer codes, which needs the vocabulary "
+                                     f"of the fitted preprocessor.")
+                self.category_codes[col] = (position[col], {value: code for code, value in enumerate(categories[col])})
+
+        self.category_index = {col: {} for col in CATEGORICAL_COLUMNS}
+        for name, i in position.items():
+            for col in CATEGORICAL_COLUMNS:
+                prefix = f"{col}_"
+                if name.startswith(prefix):
+                    self.category_index[col][name[len(prefix):]] = i
+                    break
+        self.dummy_index = np.array(sorted(i for index in self.category_index.values() for i in index.values()),
+                                    dtype=np.intp)
+
+    def encode(self, records, out=None):
+        """
+        Encodes a sequence of records into a (n_rows, n_features) matrix.
+
+        Args:
+            records: Objects exposing the raw columns as attributes.
+            out (np.ndarray, optional): Buffer to write into; it is zeroed first.
+
+        Returns:
+            np.ndarray: The encoded feature matrix.
+        """
+        n_rows = len(records)
+        if out is None:
+            out = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        else:
+            out[:] = 0.0
+        if self.absent != 0.0:
+            out[:, self.dummy_index] = self.absent
+
+        numeric = np.array([self._numeric_values(record) for record in records], dtype=np.float64)
+        numeric = np.where(np.isnan(numeric), self.numeric_medians, numeric)
+        out[:, self.numeric_index] = numeric
+        if self.feature_index is not None:
+            out[:, self.feature_index] = engineer_features(numeric, NUMERIC_COLUMNS)
+
+        for col in CATEGORICAL_COLUMNS:
+            missing = f"Missing_{col}"
+            if col in self.category_codes:
+                j, codes = self.category_codes[col]
+                for i, record in enumerate(records):
+                    value = getattr(record, col)
+                    out[i, j] = codes.get(missing if value is None else value, -1)
+                continue
+            index = self.category_index[col]
+            for i, record in enumerate(records):
+                value = getattr(record, col)
+                j = index.get(missing if value is None else value)
+                if j is not None:
+                    out[i, j] = 1.0
+
+        return out
+
+
+class DenseEncoder:
+    """
+    Checks that a model can score feature matrices in the fixed layout of the
+    dense endpoints (`input_columns`, i.e. `ChurnFeatures`), and adapts them.
+
+    The layout is positional: column j is the model's j-th column other than
+    the engineered ones. The field names are identifier-safe spellings of the
+    training columns, so they are not compared with the model's. When the model
+    was trained with engineered features, they are computed from the numeric
+    inputs by the same `engineer_features` as in training and placed at the
+    model's own positions. A model of another width, or one taking
+    integer-coded categoricals (trained on the 'native' encoding), cannot be
+    served from it, and the constructor raises ValueError saying why.
+
+    With `absent=np.nan`, dummies that are off are passed as NaN, as
+    `RawEncoder` does for XGBoost models fitted on sparse input.
+    """
+
+    def __init__(self, input_columns, feature_names, absent=0.0):
+        native = [col for col in CATEGORICAL_COLUMNS if col in feature_names]
+        if native:
+            raise ValueError(f"The model takes {native} as integer-coded categoricals, which the dense feature "
+                             f"layout does not provide. Send raw records to the /predict/raw endpoints instead.")
+        engineered = [col for col in FEATURE_NAMES if col in feature_names]
+        if engineered and len(engineered) != len(FEATURE_NAMES):
+            raise ValueError(f"The model has only some of the engineered features ({engineered}).")
+        base = [j for j, name in enumerate(feature_names) if name not in FEATURE_NAMES]
+        if len(base) != len(input_columns):
+            extra = f" besides the {len(engineered)} engineered ones" if engineered else ""
+            raise ValueError(f"The model expects {len(base)} feature columns{extra}; the dense feature layout "
+                             f"has {len(input_columns)}.")
+        self.n_features = len(feature_names)
+        self.absent = absent
+        self.dummy_index = np.array([j for j, name in enumerate(input_columns) if name not in NUMERIC_COLUMNS],
+                                    dtype=np.intp)
+        self.base_index = np.array(base, dtype=np.intp)
+        self.feature_index = None
+        if engineered:
+            position = {name: j for j, name in enumerate(feature_names)}
+            self.feature_index = np.array([position[col] for col in FEATURE_NAMES], dtype=np.intp)
+            self.numeric_index = np.array([input_columns.index(col) for col in NUMERIC_COLUMNS], dtype=np.intp)
+
+    def encode(self, X):
+        """Returns `X` as the model takes it (`X` itself when nothing changes)."""
+        if self.feature_index is not None:
+            out = np.empty((len(X), self.n_features), dtype=X.dtype)
+            out[:, self.base_index] = X
+            out[:, self.feature_index] = engineer_features(X[:, self.numeric_index], NUMERIC_COLUMNS)
+            X = out
+        elif self.absent != 0.0:
+            X = X.copy()
+        else:
+            return X
+        if self.absent != 0.0:
+            dummies = X[:, self.base_index[self.dummy_index]]
+            dummies[dummies == 0] = self.absent
+            X[:, self.base_index[self.dummy_index]] = dummies
+        return X
+        X = X.copy()
+        dummies = X[:, self.dummy_index]
+        dummies[dummies == 0] = self.absent
+        X[:, self.dummy_index] = dummies
+        return X
@@ -1,12 +1,33 @@
 # 1. IMPORTS
 # -----------------------------------------------------------------------------
-import joblib
+import asyncio
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from operator import attrgetter
+from typing import Dict, List, Optional
+
 import numpy as np
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 
-# We'll need CatBoost to load the model.
-from catboost import CatBoostClassifier
+# Make the `src` directory importable however the app is launched.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api.batching import MicroBatcher
+from api.cache import PredictionCache
+from api.encoding import DenseEncoder, RawEncoder
+from api.metrics import CONTENT_TYPE, MetricsMiddleware, ServingMetrics
+from api.prediction_log import PredictionLogger
+from api.registry import ModelRegistry
+from models.serialization import is_xgboost
+from preprocess.preprocess import ChurnPreprocessor
 
 # -----------------------------------------------------------------------------
 # 2. APPLICATION INITIALIZATION
@@ -18,6 +39,42 @@ app = FastAPI(
     description="A simple API for predicting customer churn based on multiple numerical and categorical features."
 )
 
+# Request counts, error counts and latency histograms (overall and split into
+# validation, encoding and predict_proba) are exported on /metrics in the
+# Prometheus text format. CHURN_METRICS=0 turns the instrumentation off.
+METRICS_ENABLED = os.environ.get("CHURN_METRICS", "1") == "1"
+metrics = None
+if METRICS_ENABLED:
+    metrics = ServingMetrics()
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+
+def _route(request):
+    return request.scope["route"].path
+
+
+def _phase(request, phase):
+    """
+    Times one phase of a request; a no-op when metrics are disabled.
+    """
+    if metrics is None:
+        return nullcontext()
+    return metrics.phase(_route(request), phase)
+
+
+def _validated(request):
+    """
+    Records the time from arrival until the endpoint runs, i.e. reading the
+    body and validating it against the request schema.
+    """
+    if metrics is not None:
+        metrics.phases.observe(time.perf_counter() - request.state.start_time, _route(request), "validation")
+
+
+def _count_rows(request, n_rows):
+    if metrics is not None:
+        metrics.rows.inc(_route(request), amount=n_rows)
+
 # -----------------------------------------------------------------------------
 # 3. DEFINE INPUT DATA MODEL
 # -----------------------------------------------------------------------------
@@ -209,219 +266,579 @@ class ChurnFeatures(BaseModel):
     TENURE_J_21_24_month: float = Field(..., description="Is the customer's tenure 21-24 months? (1 or 0)", example=0.0)
     TENURE_K_24_month: float = Field(..., description="Is the customer's tenure > 24 months? (1 or 0)", example=0.0)
 
+# The order of the fields above is the column order the model was trained on,
+# so we derive it once instead of spelling it out again in every endpoint.
+FEATURE_COLUMNS = list(ChurnFeatures.model_fields)
+N_FEATURES = len(FEATURE_COLUMNS)
+_feature_values = attrgetter(*FEATURE_COLUMNS)
+
+# Upper bound on the number of rows accepted by a single batch request. It keeps
+# one oversized request from holding the worker (and its memory) hostage.
+MAX_BATCH_SIZE = int(os.environ.get("CHURN_MAX_BATCH_SIZE", "10000"))
+
+
+class ColumnarBatch(BaseModel):
+    """
+    Compact batch payload: one list of values per feature column.
+    """
+    columns: Dict[str, List[float]] = Field(..., description="Mapping of feature name to its values, one entry per customer")
+
+
+class RawChurnRecord(BaseModel):
+    """
+    Data model for a raw customer record, as it appears in the Expresso CSV.
+
+    Categorical columns are sent as their original strings and are one-hot
+    encoded on the server; missing numerics are imputed with the training medians.
+    Extra CSV columns (user_id, ZONE1, MRG, ...) are ignored.
+    """
+    REGION: Optional[str] = Field(None, description="The location of each client", example="DAKAR")
+    TENURE: Optional[str] = Field(None, description="Duration in the network", example="K > 24 month")
+    TOP_PACK: Optional[str] = Field(None, description="The most active pack", example="On net 200F=Unlimited _call24H")
+    MONTANT: Optional[float] = Field(None, description="Top-up amount over the last 3 months", example=1000.0)
+    FREQUENCE_RECH: Optional[float] = Field(None, description="Number of times the customer has topped up over the last 3 months", example=5.0)
+    ARPU_SEGMENT: Optional[float] = Field(None, description="Average Revenue Per User per segment", example=50.25)
+    FREQUENCE: Optional[float] = Field(None, description="Number of times the customer engaged in activities over the last 3 months", example=12.0)
+    DATA_VOLUME: Optional[float] = Field(None, description="Data volume consumed over the last 3 months", example=2048.0)
+    ON_NET: Optional[float] = Field(None, description="On-net calls duration over the last 3 months", example=150.0)
+    ORANGE: Optional[float] = Field(None, description="Calls to Orange network over the last 3 months", example=25.0)
+    TIGO: Optional[float] = Field(None, description="Calls to Tigo network over the last 3 months", example=10.0)
+    REGULARITY: Optional[float] = Field(None, description="Number of times the customer was active over 90 days", example=45.0)
+    FREQ_TOP_PACK: Optional[float] = Field(None, description="Frequency of top-up packages purchased", example=3.0)
+
 # -----------------------------------------------------------------------------
-# 4. LOAD THE MACHINE LEARNING MODEL
+# 4. LOAD THE MACHINE LEARNING MODELS
 # -----------------------------------------------------------------------------
 
-# We'll use a variable to store our loaded model.
-model = None
-
-# A try/except block is a good practice to handle potential errors when loading
-# the model file, in case it's missing or corrupted.
-try:
-    # Load the CatBoost model from the .pkl file.
-    # The 'rb' flag means 'read binary' which is necessary for model files.
-    model = joblib.load('Catboost.pkl')
-    print("CatBoost model loaded successfully.")
-except FileNotFoundError:
-    # If the file is not found, we raise an exception to pSrevent the
-    # application from starting without a model.
-    raise RuntimeError("Error: 'catboost.pkl' model file not found. "
-                       "Please ensure the file is in the same directory.")
-except Exception as e:
-    # Handle other potential loading errors.
-    raise RuntimeError(f"Error loading model: {e}")
+# Models are discovered in these directories (earlier ones win) and loaded
+# lazily on first use. By default this is the `models/` directory that the
+# pipeline publishes retrained models to, followed by the directory of this
+# file, which holds the shipped model (Catboost.cbm, with its pickled and
+# `.npz` equivalents) used until a model has been trained.
+# CatBoost itself is only imported when the first model is loaded.
+MODEL_DIRS = os.environ.get(
+    "CHURN_MODEL_DIRS",
+    os.pathsep.join(["models", os.path.dirname(os.path.abspath(__file__))]),
+).split(os.pathsep)
+DEFAULT_MODEL = os.environ.get("CHURN_DEFAULT_MODEL", "Catboost")
+
+# 'catboost' scores with the CatBoost runtime; 'numpy' serves CatBoost models
+# from their `.npz` export, which is faster for single records and small
+# batches and never imports CatBoost. Models without an `.npz` export are
+# still scored by their own library.
+MODEL_BACKEND = os.environ.get("CHURN_MODEL_BACKEND", "catboost")
+
+# Scoring runs on its own executor rather than on the thread pool that runs
+# sync endpoints, so a burst of predictions cannot starve request parsing and
+# at most CHURN_INFERENCE_THREADS calls score at once (default: one per core).
+# CHURN_MODEL_THREADS caps the threads each call may use (CatBoost
+# `thread_count`, `n_jobs` otherwise); the library default is all cores.
+# `api/serve.py` sizes both per worker process.
+INFERENCE_THREADS = int(os.environ.get("CHURN_INFERENCE_THREADS", "0")) or os.cpu_count() or 1
+MODEL_THREADS = int(os.environ.get("CHURN_MODEL_THREADS", "0")) or None
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+
+registry = ModelRegistry(MODEL_DIRS, DEFAULT_MODEL, backend=MODEL_BACKEND, thread_count=MODEL_THREADS)
+if DEFAULT_MODEL not in {entry["name"] for entry in registry.list_models()}:
+    # Refuse to start without the default model rather than failing every request.
+    raise RuntimeError(f"Error: model '{DEFAULT_MODEL}' not found in {MODEL_DIRS}.")
+
+# Poll the model directories so a retrained model is swapped in without a restart.
+registry.start_watcher(float(os.environ.get("CHURN_MODEL_WATCH_SECONDS", "0")))
+# Set by serve.py: its supervisor forwards SIGHUP to every worker, so a reload
+# requested from one worker reaches all of them.
+SUPERVISOR_PID = int(os.environ.get("CHURN_SUPERVISOR_PID", "0"))
+
+# The fitted preprocessor saved by the training pipeline provides the medians
+# used to impute missing numerics in raw records.
+PREPROCESSOR_PATH = os.environ.get("CHURN_PREPROCESSOR_PATH", "models/preprocessor.json")
+preprocessor = None
+_preprocessor_stat = None
+
+# One raw-record encoder per distinct feature layout, built from the feature
+# names stored in the model, so the category -> column lookup always follows
+# the training column order of the model that scores the record. The dense
+# endpoints likewise map their fixed `FEATURE_COLUMNS` onto the model's columns.
+# Both caches depend on the preprocessor and are replaced along with it.
+_raw_encoders = {}
+_dense_encoders = {}
+_encoders_lock = threading.Lock()
+
+
+def _file_stat(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_preprocessor():
+    """
+    Loads the preprocessor from `PREPROCESSOR_PATH` if the file changed since the
+    last load, and drops the encoders built from the previous one.
+
+    The pipeline publishes the preprocessor before the models it was fitted
+    for, so this runs whenever the registry swaps in a new model version.
+    """
+    global preprocessor, _preprocessor_stat, _raw_encoders, _dense_encoders
+    stat = _file_stat(PREPROCESSOR_PATH)
+    if stat == _preprocessor_stat:
+        return
+    try:
+        loaded = ChurnPreprocessor.load(PREPROCESSOR_PATH) if stat else None
+    except Exception as e:
+        print(f"Could not load the preprocessor from {PREPROCESSOR_PATH}: {e}")
+        return
+    with _encoders_lock:
+        preprocessor, _preprocessor_stat = loaded, stat
+        _raw_encoders, _dense_encoders = {}, {}
+    if loaded is not None:
+        print("Preprocessor loaded successfully.")
+
+
+def _after_fork():
+    # The lock may have been held by another thread when the process forked.
+    global _encoders_lock
+    _encoders_lock = threading.Lock()
+
+
+load_preprocessor()
+registry.add_listener(lambda name, old, new: load_preprocessor())
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _get_model(model_name, version):
+    """
+    Resolves the requested model version, loading it on first use.
+    """
+    try:
+        return registry.get(model_name, version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading model: {e}")
+
+
+def _sparse_fitted(handle):
+    # XGBoost models fitted on the sparse 'native' matrix (the only ones without
+    # feature names) read dummies that are off as missing rather than as 0.
+    return is_xgboost(handle.model) and not handle.feature_names
+
+
+def _feature_layout(handle):
+    # Models saved without feature names use the preprocessor's column order.
+    return tuple(handle.feature_names or (preprocessor.columns if preprocessor else FEATURE_COLUMNS))
+
+
+def _raw_encoder(handle):
+    sparse = _sparse_fitted(handle)
+    key = (tuple(handle.feature_names or ()), sparse)
+    encoder = _raw_encoders.get(key)
+    if encoder is None:
+        # Built under the lock, so an encoder from a replaced preprocessor never
+        # lands in the new cache.
+        with _encoders_lock:
+            try:
+                encoder = RawEncoder(_feature_layout(handle), medians=preprocessor.medians if preprocessor else None,
+                                     categories=preprocessor.categories if preprocessor else None,
+                                     absent=np.nan if sparse else 0.0)
+            except ValueError as e:
+                raise HTTPException(status_code=500, detail=f"Cannot encode raw records for model '{handle.name}': "
+                                                            f"{e} No preprocessor was found at {PREPROCESSOR_PATH}.")
+            _raw_encoders[key] = encoder
+    return encoder
+
+
+def _dense_encoder(handle):
+    sparse = _sparse_fitted(handle)
+    key = (tuple(handle.feature_names or ()), sparse)
+    encoder = _dense_encoders.get(key)
+    if encoder is None:
+        with _encoders_lock:
+            feature_names = _feature_layout(handle)
+            # Models saved without feature names can still tell their width
+            # (CatBoost models loaded from .cbm report 0).
+            n_features = getattr(handle.model, "n_features_in_", 0)
+            if n_features and n_features != len(feature_names):
+                raise HTTPException(status_code=422, detail=f"Model '{handle.name}' cannot score these features: it "
+                                                            f"expects {n_features} feature columns, but its feature "
+                                                            f"layout has {len(feature_names)}.")
+            try:
+                encoder = DenseEncoder(FEATURE_COLUMNS, feature_names, np.nan if sparse else 0.0)
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=f"Model '{handle.name}' cannot score these features: {e}")
+            _dense_encoders[key] = encoder
+    return encoder
+
+
+# When enabled, concurrent single-record requests are coalesced into one
+# vectorized `predict_proba` call (per model version) instead of one call each.
+MICROBATCH_ENABLED = os.environ.get("CHURN_MICROBATCH", "0") == "1"
+batcher = None
+if MICROBATCH_ENABLED:
+    batcher = MicroBatcher(
+        lambda handle, input_data: handle.predict_proba(input_data)[:, 1],
+        max_batch_size=int(os.environ.get("CHURN_MICROBATCH_MAX_SIZE", "64")),
+        max_wait_ms=float(os.environ.get("CHURN_MICROBATCH_WAIT_MS", "2")),
+        executor=inference_executor,
+    )
+
+
+# Repeat lookups of the same customer are answered from an in-process LRU cache
+# keyed by model version and feature-vector hash. CHURN_CACHE_SIZE=0 disables it.
+CACHE_SIZE = int(os.environ.get("CHURN_CACHE_SIZE", "10000"))
+prediction_cache = None
+if CACHE_SIZE > 0:
+    prediction_cache = PredictionCache(
+        maxsize=CACHE_SIZE,
+        ttl=float(os.environ.get("CHURN_CACHE_TTL_SECONDS", "0")) or None,
+    )
+    registry.add_listener(lambda name, old, new: prediction_cache.invalidate(name))
+
+
+# Every prediction (inputs, probability, model version, latency) is appended to
+# a JSON-lines log for monitoring and retraining. Requests only enqueue; a
+# background thread writes in bulk and rotates the file. An empty
+# CHURN_PREDICTION_LOG disables it.
+PREDICTION_LOG_PATH = os.environ.get("CHURN_PREDICTION_LOG", os.path.join("logs", "requests.jsonl"))
+prediction_logger = None
+if PREDICTION_LOG_PATH:
+    prediction_logger = PredictionLogger(
+        PREDICTION_LOG_PATH,
+        max_queue=int(os.environ.get("CHURN_PREDICTION_LOG_QUEUE", "10000")),
+        compress=os.environ.get("CHURN_PREDICTION_LOG_GZIP", "0") == "1",
+        max_bytes=int(float(os.environ.get("CHURN_PREDICTION_LOG_MAX_MB", "100")) * 2**20),
+        rotate_seconds=float(os.environ.get("CHURN_PREDICTION_LOG_ROTATE_SECONDS", "0")) or None,
+    )
+
+
+def _log_predictions(request, handle, inputs, probabilities):
+    """
+    Queues the scored rows for the prediction log. `inputs` is either a feature
+    matrix in `FEATURE_COLUMNS` order or a list of raw records.
+    """
+    if prediction_logger is None:
+        return
+    # The arrival time is stamped by the metrics middleware, when it is enabled.
+    start = getattr(request.state, "start_time", None)
+    prediction_logger.log(_route(request), handle.name, handle.version, FEATURE_COLUMNS, inputs, probabilities,
+                          time.perf_counter() - start if start is not None else None)
+
+
+async def _predict_one(handle, input_data):
+    """
+    Scores a single-row feature matrix, from the cache when possible and through
+    the micro-batcher when enabled.
+    """
+    if prediction_cache is not None:
+        key = PredictionCache.key(handle, input_data[0])
+        churn_probability = prediction_cache.get(key)
+        if churn_probability is not None:
+            return churn_probability
+
+    if batcher is not None:
+        churn_probability = await batcher.submit(input_data[0], key=handle)
+    else:
+        # `predict_proba` is CPU-bound, so keep it off the event loop.
+        prediction = await asyncio.get_running_loop().run_in_executor(
+            inference_executor, handle.predict_proba, input_data)
+        churn_probability = float(prediction[0][1])
+
+    if prediction_cache is not None:
+        prediction_cache.put(key, churn_probability)
+    return churn_probability
 
 # -----------------------------------------------------------------------------
 # 5. DEFINE THE API ENDPOINT
 # -----------------------------------------------------------------------------
 
 # The endpoint `'/predict'` will handle POST requests.
-# It accepts the `ChurnFeatures` data model in the request body.
+# It accepts the `ChurnFeatures` data model in the request body; the optional
+# `model` and `version` query parameters select the model that scores it.
 @app.post("/predict")
-def predict_churn(features: ChurnFeatures):
+async def predict_churn(features: ChurnFeatures,
+                        request: Request,
+                        model_name: Optional[str] = Query(None, alias="model"),
+                        version: Optional[str] = None):
     """
     Predicts the probability of a customer churning.
 
     Args:
         features (ChurnFeatures): A JSON object containing the input features.
+        model_name (str, optional): Model to use; defaults to `DEFAULT_MODEL`.
+        version (str, optional): Model version; defaults to the latest one.
 
     Returns:
         A JSON object with the predicted churn probability.
     """
-    if model is None:
-        raise HTTPException(status_code=500, detail="Model is not loaded.")
+    _validated(request)
+    handle = _get_model(model_name, version)
+    encoder = _dense_encoder(handle)
 
     # Convert the Pydantic model's data into a NumPy array, which is the
     # standard input format for many machine learning models.
     # We create a 2D array, as models typically expect a list of samples.
-    input_data = np.array([[
-        features.MONTANT, features.FREQUENCE_RECH, features.ARPU_SEGMENT,
-        features.FREQUENCE, features.DATA_VOLUME, features.ON_NET,
-        features.ORANGE, features.TIGO, features.REGULARITY,
-        features.FREQ_TOP_PACK, features.REGION_DIOURBEL,
-        features.REGION_FATICK, features.REGION_KAFFRINE,
-        features.REGION_KAOLACK, features.REGION_KEDOUGOU,
-        features.REGION_KOLDA, features.REGION_LOUGA, features.REGION_MATAM,
-        features.REGION_Missing_REGION, features.REGION_SAINT_LOUIS,
-        features.REGION_SEDHIOU, features.REGION_TAMBACOUNDA,
-        features.REGION_THIES, features.REGION_ZIGUINCHOR,
-        features.TOP_PACK_1500_Unlimited7Day,
-        features.TOP_PACK_150_unlimited_pilot_auto,
-        features.TOP_PACK_200_Unlimited1Day,
-        features.TOP_PACK_200_unlimited_pilot_auto,
-        features.TOP_PACK_200F_10mnOnNetValid1H,
-        features.TOP_PACK_3017650070,
-        features.TOP_PACK_3051550090,
-        features.TOP_PACK_500_Unlimited3Day,
-        features.TOP_PACK_APANews_monthly,
-        features.TOP_PACK_APANews_weekly,
-        features.TOP_PACK_All_net_1000_5000_5d,
-        features.TOP_PACK_All_net_1000F_3000F_On_3000F_Off_5d,
-        features.TOP_PACK_All_net_300_600_2d,
-        features.TOP_PACK_All_net_5000_20000off_20000on_30d,
-        features.TOP_PACK_All_net_500_4000off_4000on_24H,
-        features.TOP_PACK_All_net_500F_2000F_AllNet_Unlimited,
-        features.TOP_PACK_All_net_500F_1250F_AllNet_1250_Onnet_48h,
-        features.TOP_PACK_All_net_500F_2000F_5d,
-        features.TOP_PACK_All_net_500F_4000F_5d,
-        features.TOP_PACK_All_net_600F_3000F_5d,
-        features.TOP_PACK_CVM_100F_unlimited,
-        features.TOP_PACK_CVM_100f_200_MB,
-        features.TOP_PACK_CVM_100f_500_onNet,
-        features.TOP_PACK_CVM_150F_unlimited,
-        features.TOP_PACK_CVM_200f_400MB,
-        features.TOP_PACK_CVM_500f_2GB,
-        features.TOP_PACK_CVM_On_net_1300f_125000,
-        features.TOP_PACK_CVM_On_net_400f_2200F,
-        features.TOP_PACK_CVM_on_net_bundle_500_50000,
-        features.TOP_PACK_Data_100_F_40MB_24H,
-        features.TOP_PACK_Data_200_F_100MB_24H,
-        features.TOP_PACK_Data_200F_1GB_24H,
-        features.TOP_PACK_Data_490F_Night_00H_08H,
-        features.TOP_PACK_Data_1000F_2GB_30d,
-        features.TOP_PACK_Data_1000F_5GB_7d,
-        features.TOP_PACK_Data_1000F_700MB_7d,
-        features.TOP_PACK_Data_1500F_3GB_30D,
-        features.TOP_PACK_Data_1500F_SPPackage1_30d,
-        features.TOP_PACK_Data_150F_SPPackage1_24H,
-        features.TOP_PACK_Data_200F_Unlimited_24H,
-        features.TOP_PACK_Data_3000F_10GB_30d,
-        features.TOP_PACK_Data_300F_100MB_2d,
-        features.TOP_PACK_Data_30Go_V_30_Days,
-        features.TOP_PACK_Data_490F_1GB_7d,
-        features.TOP_PACK_Data_500F_2GB_24H,
-        features.TOP_PACK_Data_50F_30MB_24H,
-        features.TOP_PACK_Data_700F_1_5GB_7d,
-        features.TOP_PACK_Data_700F_SPPackage1_7d,
-        features.TOP_PACK_Data_DailyCycle_Pilot_1_5GB,
-        features.TOP_PACK_Data_New_GPRS_PKG_1500F,
-        features.TOP_PACK_Data_OneTime_Pilot_1_5GB,
-        features.TOP_PACK_DataPack_Incoming,
-        features.TOP_PACK_Data_EVC_2Go24H,
-        features.TOP_PACK_Data_Mifi_10Go,
-        features.TOP_PACK_Data_Mifi_10Go_Monthly,
-        features.TOP_PACK_Data_Mifi_20Go,
-        features.TOP_PACK_ESN_POSTPAID_CLASSIC_RENT,
-        features.TOP_PACK_EVC_1000_6000_F,
-        features.TOP_PACK_EVC_100Mo,
-        features.TOP_PACK_EVC_1Go,
-        features.TOP_PACK_EVC_4900_12000F,
-        features.TOP_PACK_EVC_500_2000F,
-        features.TOP_PACK_EVC_700Mo,
-        features.TOP_PACK_EVC_JOKKO300,
-        features.TOP_PACK_EVC_Jokko_Weekly,
-        features.TOP_PACK_EVC_MEGA10000F,
-        features.TOP_PACK_EVC_PACK_2_2Go,
-        features.TOP_PACK_FIFA_TS_daily,
-        features.TOP_PACK_FIFA_TS_monthly,
-        features.TOP_PACK_FIFA_TS_weekly,
-        features.TOP_PACK_FNF2_JAPPANTE,
-        features.TOP_PACK_FNF_Youth_ESN,
-        features.TOP_PACK_Facebook_MIX_2D,
-        features.TOP_PACK_GPRS_3000Equal10GPORTAL,
-        features.TOP_PACK_GPRS_5Go_7D_PORTAL,
-        features.TOP_PACK_GPRS_BKG_1000F_MIFI,
-        features.TOP_PACK_GPRS_PKG_5GO_ILLIMITE,
-        features.TOP_PACK_Go_NetPro_4_Go,
-        features.TOP_PACK_IVR_Echat_Daily_50F,
-        features.TOP_PACK_IVR_Echat_Monthly_500F,
-        features.TOP_PACK_IVR_Echat_Weekly_200F,
-        features.TOP_PACK_Incoming_Bonus_woma,
-        features.TOP_PACK_Internat_1000F_Zone_1_24H,
-        features.TOP_PACK_Internat_1000F_Zone_3_24h,
-        features.TOP_PACK_Internat_2000F_Zone_2_24H,
-        features.TOP_PACK_Jokko_Daily,
-        features.TOP_PACK_Jokko_Monthly,
-        features.TOP_PACK_Jokko_Weekly,
-        features.TOP_PACK_Jokko_promo,
-        features.TOP_PACK_MIXT_200mnoff_net_unl_on_net_5Go_30d,
-        features.TOP_PACK_MIXT_390F_04HOn_net_400SMS_400_Mo_4h,
-        features.TOP_PACK_MIXT_4900F_10H_on_net_1_5Go_30d,
-        features.TOP_PACK_MIXT_5000F_80Konnet_20Koffnet_250Mo_30d,
-        features.TOP_PACK_MIXT_500F_75_SMS_ONNET_Mo_1000FAllNet_24h,
-        features.TOP_PACK_MIXT_590F_02H_On_net_200SMS_200_Mo_24h,
-        features.TOP_PACK_MIXT_10000F_10hAllnet_3Go_1h_Zone3_30d,
-        features.TOP_PACK_MIXT_1000F_4250_Off_net_4250F_On_net_100Mo_5d,
-        features.TOP_PACK_MIXT_500F_2500F_on_net_2500F_off_net_2d,
-        features.TOP_PACK_MROMO_TIMWES_OneDAY,
-        features.TOP_PACK_MROMO_TIMWES_RENEW,
-        features.TOP_PACK_MegaChrono_3000F_12500F_TOUS_RESEAUX,
-        features.TOP_PACK_Missing_TOP_PACK,
-        features.TOP_PACK_Mixt_250F_Unlimited_call24H,
-        features.TOP_PACK_Mixt_500F_2500Fonnet_2500Foffnet_5d,
-        features.TOP_PACK_NEW_CLIR_PERMANENT_LIBERTE_MOBILE,
-        features.TOP_PACK_NEW_CLIR_TEMPALLOWED_LIBERTE_MOBILE,
-        features.TOP_PACK_NEW_CLIR_TEMPRESTRICTED_LIBERTE_MOBILE,
-        features.TOP_PACK_New_YAKALMA_4_ALL,
-        features.TOP_PACK_On_net_200F_3000F_10Mo_24H,
-        features.TOP_PACK_On_net_200F_Unlimited_call24H,
-        features.TOP_PACK_On_net_1000F_10MilF_10d,
-        features.TOP_PACK_On_net_2000f_One_Month_100H_30d,
-        features.TOP_PACK_On_net_200F_60mn_1d,
-        features.TOP_PACK_On_net_300F_1800F_3d,
-        features.TOP_PACK_On_net_500_4000_10d,
-        features.TOP_PACK_On_net_500F_FNF_3d,
-        features.TOP_PACK_Package3_Monthly,
-        features.TOP_PACK_Pilot_Youth1_2900,
-        features.TOP_PACK_Pilot_Youth4_4900,
-        features.TOP_PACK_Postpaid_FORFAIT_10H_Package,
-        features.TOP_PACK_SMS_Max,
-        features.TOP_PACK_SUPERMAGIK_1000,
-        features.TOP_PACK_SUPERMAGIK_5000,
-        features.TOP_PACK_Staff_CPE_Rent,
-        features.TOP_PACK_TelmunCRBT_daily,
-        features.TOP_PACK_Twter_U2opia_Daily,
-        features.TOP_PACK_Twter_U2opia_Monthly,
-        features.TOP_PACK_Twter_U2opia_Weekly,
-        features.TOP_PACK_VAS_IVR_Radio_Daily,
-        features.TOP_PACK_VAS_IVR_Radio_Monthly,
-        features.TOP_PACK_VAS_IVR_Radio_Weekly,
-        features.TOP_PACK_WIFI_Family_10MBPS,
-        features.TOP_PACK_WIFI_Family_4MBPS,
-        features.TOP_PACK_WIFI_Family_2MBPS,
-        features.TOP_PACK_YMGX_100_1_hour_FNF_24H_1_month,
-        features.TOP_PACK_YMGX_on_net_100_700F_24H,
-        features.TOP_PACK_Yewouleen_PKG,
-        features.TOP_PACK_pack_chinguitel_24h,
-        features.TOP_PACK_pilot_offer4,
-        features.TOP_PACK_pilot_offer5,
-        features.TOP_PACK_pilot_offer6,
-        features.TOP_PACK_pilot_offer7,
-        features.TENURE_E_6_9_month, features.TENURE_F_9_12_month,
-        features.TENURE_G_12_15_month, features.TENURE_H_15_18_month,
-        features.TENURE_I_18_21_month, features.TENURE_J_21_24_month,
-        features.TENURE_K_24_month
-    ]])
-
-    # Make the prediction using the loaded CatBoost model.
-    # The `predict_proba` method returns probabilities for all classes.
-    # For a binary classification (churn/no-churn), it returns something like [[prob_no_churn, prob_churn]].
-    prediction = model.predict_proba(input_data)
-
-    # CatBoost's `predict_proba` returns a list of lists,
-    # so we extract the probability for the "churn" class (index 1).
-    churn_probability = prediction[0][1]
+    with _phase(request, "encoding"):
+        input_data = np.array([_feature_values(features)])
+
+    # Make the prediction using the loaded CatBoost model and keep the
+    # probability of the "churn" class (index 1).
+    with _phase(request, "predict_proba"):
+        churn_probability = await _predict_one(handle, encoder.encode(input_data))
+    _count_rows(request, 1)
+    _log_predictions(request, handle, input_data, [churn_probability])
 
     # Return the result as a JSON response.
-    return {"churn_probability": float(churn_probability)}
+    return {"churn_probability": churn_probability, "model": handle.name, "version": handle.version}
+
+# -----------------------------------------------------------------------------
+# 6. BATCH ENDPOINTS
+# -----------------------------------------------------------------------------
+
+# All batch endpoints fill a single preallocated (n_rows, n_features) matrix and
+# score it with one `predict_proba` call, so the cost per request is dominated
+# by the model rather than by Python overhead per customer.
+
+def _check_batch_size(n_rows):
+    if n_rows == 0:
+        raise HTTPException(status_code=422, detail="Batch is empty.")
+    if n_rows > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413,
+                            detail=f"Batch of {n_rows} rows exceeds the limit of {MAX_BATCH_SIZE}.")
+
+
+def _score_matrix(handle, input_data, request, inputs):
+    """
+    Scores a 2D feature matrix and returns the churn probabilities in row order.
+
+    `inputs` is what the matrix was encoded from, and is what gets logged: the
+    raw records, or the matrix in `FEATURE_COLUMNS` order. Called from a
+    worker thread, which waits for the inference executor to score the matrix.
+    """
+    _count_rows(request, len(input_data))
+    with _phase(request, "predict_proba"):
+        prediction = inference_executor.submit(handle.predict_proba, input_data).result()
+    churn_probabilities = prediction[:, 1].astype(float).tolist()
+    _log_predictions(request, handle, inputs, churn_probabilities)
+    return {
+        "churn_probabilities": churn_probabilities,
+        "model": handle.name,
+        "version": handle.version,
+    }
+
+
+@app.post("/predict/batch")
+def predict_churn_batch(batch: List[ChurnFeatures],
+                        request: Request,
+                        model_name: Optional[str] = Query(None, alias="model"),
+                        version: Optional[str] = None):
+    """
+    Predicts churn probabilities for a JSON array of customers.
+
+    Args:
+        batch (List[ChurnFeatures]): A JSON array of feature objects.
+
+    Returns:
+        A JSON object with one churn probability per input row, in input order.
+    """
+    _validated(request)
+    _check_batch_size(len(batch))
+    handle = _get_model(model_name, version)
+    encoder = _dense_encoder(handle)
+
+    with _phase(request, "encoding"):
+        input_data = np.empty((len(batch), N_FEATURES), dtype=np.float64)
+        for i, features in enumerate(batch):
+            input_data[i] = _feature_values(features)
+
+    return _score_matrix(handle, encoder.encode(input_data), request, input_data)
+
+
+@app.post("/predict/batch/columnar")
+def predict_churn_columnar(batch: ColumnarBatch,
+                           request: Request,
+                           model_name: Optional[str] = Query(None, alias="model"),
+                           version: Optional[str] = None):
+    """
+    Predicts churn probabilities for a columnar batch.
+
+    Args:
+        batch (ColumnarBatch): A JSON object mapping every feature name to a
+            list of values. All lists must have the same length.
+
+    Returns:
+        A JSON object with one churn probability per row, in input order.
+    """
+    _validated(request)
+    missing = [col for col in FEATURE_COLUMNS if col not in batch.columns]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Missing feature columns: {missing}")
+
+    n_rows = len(batch.columns[FEATURE_COLUMNS[0]])
+    if any(len(batch.columns[col]) != n_rows for col in FEATURE_COLUMNS):
+        raise HTTPException(status_code=422, detail="All feature columns must have the same length.")
+    _check_batch_size(n_rows)
+    handle = _get_model(model_name, version)
+    encoder = _dense_encoder(handle)
+
+    with _phase(request, "encoding"):
+        input_data = np.empty((n_rows, N_FEATURES), dtype=np.float64)
+        for j, col in enumerate(FEATURE_COLUMNS):
+            input_data[:, j] = batch.columns[col]
+
+    return _score_matrix(handle, encoder.encode(input_data), request, input_data)
+
+
+@app.post("/predict/batch/ndjson")
+async def predict_churn_ndjson(request: Request,
+                               model_name: Optional[str] = Query(None, alias="model"),
+                               version: Optional[str] = None):
+    """
+    Predicts churn probabilities for a newline-delimited JSON body.
+
+    Each line is either a JSON array of feature values in `FEATURE_COLUMNS`
+    order or a JSON object keyed by feature name.
+
+    Returns:
+        A JSON object with one churn probability per line, in input order.
+    """
+    # The body is read here rather than by FastAPI, so reading it counts as validation.
+    body = await request.body()
+    _validated(request)
+    lines = [line for line in body.splitlines() if line.strip()]
+    _check_batch_size(len(lines))
+    handle = _get_model(model_name, version)
+    encoder = _dense_encoder(handle)
+
+    with _phase(request, "encoding"):
+        input_data = np.empty((len(lines), N_FEATURES), dtype=np.float64)
+        try:
+            for i, line in enumerate(lines):
+                row = json.loads(line)
+                if isinstance(row, dict):
+                    row = [row[col] for col in FEATURE_COLUMNS]
+                input_data[i] = row
+        except (ValueError, TypeError, KeyError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid NDJSON row {i + 1}: {e}")
+
+    return await run_in_threadpool(_score_matrix, handle, encoder.encode(input_data), request, input_data)
+
+
+# -----------------------------------------------------------------------------
+# 7. RAW-RECORD ENDPOINTS
+# -----------------------------------------------------------------------------
+
+@app.post("/predict/raw")
+async def predict_churn_raw(record: RawChurnRecord,
+                            request: Request,
+                            model_name: Optional[str] = Query(None, alias="model"),
+                            version: Optional[str] = None):
+    """
+    Predicts the probability of churn from a raw customer record.
+
+    Args:
+        record (RawChurnRecord): The customer as it appears in the raw CSV.
+
+    Returns:
+        A JSON object with the predicted churn probability.
+    """
+    _validated(request)
+    handle = _get_model(model_name, version)
+    with _phase(request, "encoding"):
+        input_data = _raw_encoder(handle).encode([record])
+    with _phase(request, "predict_proba"):
+        churn_probability = await _predict_one(handle, input_data)
+    _count_rows(request, 1)
+    _log_predictions(request, handle, [record], [churn_probability])
+    return {"churn_probability": churn_probability, "model": handle.name, "version": handle.version}
+
+
+@app.post("/predict/batch/raw")
+def predict_churn_batch_raw(batch: List[RawChurnRecord],
+                            request: Request,
+                            model_name: Optional[str] = Query(None, alias="model"),
+                            version: Optional[str] = None):
+    """
+    Predicts churn probabilities for a JSON array of raw customer records.
+
+    Returns:
+        A JSON object with one churn probability per input row, in input order.
+    """
+    _validated(request)
+    _check_batch_size(len(batch))
+    handle = _get_model(model_name, version)
+    with _phase(request, "encoding"):
+        input_data = _raw_encoder(handle).encode(batch)
+    return _score_matrix(handle, input_data, request, batch)
+
+
+# -----------------------------------------------------------------------------
+# 8. SERVING STATISTICS
+# -----------------------------------------------------------------------------
+
+@app.get("/stats/batching")
+def batching_stats():
+    """
+    Reports the micro-batcher's queue depth, batch sizes and queueing delay.
+    """
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+
+@app.get("/stats/cache")
+def cache_stats():
+    """
+    Reports the prediction cache's size and hit/miss/eviction counters.
+    """
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+
+@app.get("/stats/prediction_log")
+def prediction_log_stats():
+    """
+    Reports the prediction log's queue depth and written/dropped counters.
+    """
+    if prediction_logger is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_logger.stats()}
+
+
+@app.get("/metrics")
+def serving_metrics():
+    """
+    Exports request counters and latency histograms in the Prometheus text format.
+    """
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (CHURN_METRICS=0).")
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+
+# -----------------------------------------------------------------------------
+# 9. MODEL REGISTRY
+# -----------------------------------------------------------------------------
+
+@app.get("/models")
+def list_models():
+    """
+    Lists every discovered model version and whether it is loaded.
+    """
+    return {"default_model": DEFAULT_MODEL, "models": registry.list_models()}
+
+
+@app.post("/models/reload")
+def reload_models():
+    """
+    Re-scans the model directories and swaps in new default versions.
+
+    The new version is loaded before it replaces the old one, so requests
+    keep being served while the reload runs. Under serve.py, the other workers
+    are then reloaded too; the response covers this worker only.
+    """
+    swapped = registry.refresh()
+    if SUPERVISOR_PID and SUPERVISOR_PID != os.getpid():
+        os.kill(SUPERVISOR_PID, signal.SIGHUP)
+    return {"swapped": {name: {"old": old, "new": new} for name, (old, new) in swapped.items()}}
@@ -0,0 +1,155 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with optional labels.
+
+    `observe` only increments one bucket counter; the cumulative counts the
+    Prometheus format expects are computed when the metrics are rendered.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(names, labels + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class ServingMetrics:
+    """
+    Request counters and latency histograms of the prediction API.
+
+    Request latency is split into phases: `validation` (from arrival until
+    the endpoint runs, i.e. body parsing and schema validation), `encoding`
+    (building the feature matrix) and `predict_proba` (scoring, including any
+    micro-batching delay).
+    """
+
+    def __init__(self):
+        self.requests = Counter("churn_requests_total", "HTTP requests by path and status code.",
+                                ("path", "status"))
+        self.errors = Counter("churn_request_errors_total", "Requests that failed with a 4xx/5xx status.",
+                              ("path",))
+        self.rows = Counter("churn_predicted_rows_total", "Customers scored.", ("path",))
+        self.latency = Histogram("churn_request_duration_seconds", "End-to-end request latency.", ("path",))
+        self.phases = Histogram("churn_request_phase_seconds", "Request latency by phase.", ("path", "phase"))
+        self._metrics = [self.requests, self.errors, self.rows, self.latency, self.phases]
+
+    def observe_request(self, path, status, seconds):
+        self.requests.inc(path, status)
+        if status >= 400:
+            self.errors.inc(path)
+        self.latency.observe(seconds, path)
+
+    @contextmanager
+    def phase(self, path, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.observe(time.perf_counter() - start, path, phase)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that stamps each request's start time on `request.state`
+    and records its status and latency once the response has started.
+
+    Written as plain ASGI rather than `BaseHTTPMiddleware`, which would add
+    a task and a response copy to every request.
+    """
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        scope.setdefault("state", {})["start_time"] = start
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Requests are labelled by route template; unknown paths share one
+            # label, so scanners cannot grow the number of series without bound.
+            path = getattr(scope.get("route"), "path", "unmatched")
+            self.metrics.observe_request(path, status, time.perf_counter() - start)
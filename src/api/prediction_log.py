@@ -0,0 +1,214 @@
+import atexit
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class PredictionLogger:
+    """
+    Asynchronous JSON-lines log of served predictions.
+
+    `log` only puts one tuple on a bounded in-memory queue. A background thread
+    wakes every `flush_interval` seconds, drains the queue, turns the requests
+    into one line per scored row and appends them to `path` in one write. It
+    never wakes per request, so it does not compete with the request path for
+    the GIL between flushes. When the queue is full the request is dropped and
+    counted rather than blocking the request path.
+
+    With `compress`, every flush is written as one gzip member, so the file is
+    a valid (multi-member) gzip stream that `gzip.open` reads line by line.
+    The file is rotated to `<name>-<timestamp>.jsonl[.gz]` once it reaches
+    `max_bytes` or is `rotate_seconds` old; rotated files are kept.
+
+    A process forked from the one that created the logger (e.g. a prefork
+    server worker) gets a fresh queue and writer thread and its own file,
+    `<name>.<pid>.jsonl[.gz]`, so workers never rotate each other's file.
+    """
+
+    def __init__(self, path, max_queue=10_000, flush_interval=1.0, compress=False, max_bytes=100 * 2**20,
+                 rotate_seconds=None):
+        self.path = path + ".gz" if compress and not path.endswith(".gz") else path
+        self._base_path = self.path
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._file = None
+        self._bytes = 0
+        self._opened = 0.0
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.flushes = 0
+        self.rotations = 0
+        self.write_errors = 0
+        self._start_writer()
+        atexit.register(self.close)
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start_writer(self):
+        self._writer = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._writer.start()
+
+    def _after_fork(self):
+        # Only the forking thread exists in the child, and the parent's locks
+        # and queue may have been in use at fork time: start over.
+        stem, ext = self._split_gz(self._base_path)
+        base, suffix = os.path.splitext(stem)
+        self.path = f"{base}.{os.getpid()}{suffix}{ext}"
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._file = None
+        self.enqueued = self.dropped = self.written = self.flushes = self.rotations = self.write_errors = 0
+        self._start_writer()
+
+    def _split_gz(self, path):
+        return (path[:-3], ".gz") if self.compress else (path, "")
+
+    def log(self, path, model, version, feature_names, inputs, probabilities, latency_seconds=None):
+        """
+        Queue one request for logging; never blocks.
+
+        Args:
+            path (str): Endpoint that served the request.
+            model, version (str): Model version that scored it.
+            feature_names (list): Column names of the rows in `inputs`.
+            inputs: A 2D feature matrix, or a list of raw-record models.
+            probabilities (list): Churn probability of every row.
+            latency_seconds (float, optional): Time spent serving the request so far.
+
+        Returns:
+            bool: False if the queue was full and the request was dropped.
+        """
+        try:
+            self._queue.put_nowait((time.time(), path, model, version, feature_names, inputs, probabilities,
+                                    latency_seconds))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    @staticmethod
+    def _lines(entry):
+        timestamp, path, model, version, feature_names, inputs, probabilities, latency_seconds = entry
+        latency_ms = round(latency_seconds * 1000, 3) if latency_seconds is not None else None
+        names = np.asarray(feature_names, dtype=object)
+        for i, probability in enumerate(probabilities):
+            row = inputs[i]
+            if hasattr(row, "model_dump"):
+                record = row.model_dump(exclude_none=True)
+            else:
+                # One-hot rows are mostly zeros; only the non-zero features are written.
+                nonzero = np.flatnonzero(row)
+                record = dict(zip(names[nonzero], row[nonzero].tolist()))
+            yield json.dumps({
+                "timestamp": timestamp,
+                "path": path,
+                "model": model,
+                "version": version,
+                "latency_ms": latency_ms,
+                "churn_probability": probability,
+                "inputs": record,
+            }) + "\n"
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            self._flush(self._drain())
+        self._flush(self._drain())
+        self._close_file()
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _flush(self, batch):
+        if self._file is not None and self._should_rotate():
+            self._rotate()
+        if not batch:
+            return
+        try:
+            lines = []
+            for i, entry in enumerate(batch, 1):
+                lines.extend(self._lines(entry))
+                if i % 32 == 0:
+                    # Serializing is pure Python; give the request threads the GIL
+                    # back regularly instead of holding it for the whole flush.
+                    time.sleep(0)
+            data = "".join(lines).encode()
+            if self.compress:
+                data = gzip.compress(data, compresslevel=6)
+            if self._file is None:
+                self._open()
+            self._file.write(data)
+            self._file.flush()
+        except Exception:
+            self.write_errors += 1
+            return
+        self._bytes += len(data)
+        self.written += len(lines)
+        self.flushes += 1
+
+    def _should_rotate(self):
+        if self.max_bytes and self._bytes >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.time() - self._opened >= self.rotate_seconds
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._bytes = self._file.tell()
+        self._opened = time.time()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        self._close_file()
+        stem, ext = self._split_gz(self.path)
+        base, suffix = os.path.splitext(stem)
+        rotated = f"{base}-{time.strftime('%Y%m%dT%H%M%S')}{suffix}{ext}"
+        n = 1
+        while os.path.exists(rotated):
+            rotated = f"{base}-{time.strftime('%Y%m%dT%H%M%S')}.{n}{suffix}{ext}"
+            n += 1
+        os.replace(self.path, rotated)
+        self.rotations += 1
+
+    def close(self, timeout=10.0):
+        """Write everything still queued and stop the writer thread."""
+        if not self._writer.is_alive():
+            return
+        self._stopping.set()
+        self._writer.join(timeout)
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "queue_depth": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written_rows": self.written,
+            "flushes": self.flushes,
+            "rotations": self.rotations,
+            "write_errors": self.write_errors,
+        }
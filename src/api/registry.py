@@ -0,0 +1,231 @@
+import os
+import re
+import threading
+
+import numpy as np
+
+from models.serialization import BACKEND_FORMATS, MODEL_LOADERS, is_catboost
+
+
+def version_key(version):
+    """Sort key comparing the digit runs of a version as numbers, so "10" > "9" and "v1.10" > "v1.9"."""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", version)]
+
+
+class LoadedModel:
+    """
+    One loaded model version. Requests keep a reference to the instance they
+    started with, so a swap never changes the model under an in-flight request.
+
+    `thread_count` caps the threads one `predict_proba` call may use: CatBoost's
+    `thread_count`, or `n_jobs` for models that have one. None keeps the
+    library default (all cores).
+
+    CatBoost models trained on the 'native' encoding get their categorical
+    columns as integer category codes. These arrive in the float feature matrix
+    like every other column and are converted before scoring.
+    """
+
+    def __init__(self, name, version, path, model, thread_count=None):
+        self.name = name
+        self.version = version
+        self.path = path
+        self.model = model
+        self._predict_kwargs = {}
+        self._cat_features = list(model.get_cat_feature_indices()) if is_catboost(model) else []
+        if thread_count:
+            if is_catboost(model):
+                self._predict_kwargs["thread_count"] = thread_count
+            elif hasattr(model, "n_jobs"):
+                model.set_params(n_jobs=thread_count)
+        names = getattr(model, "feature_names_", None)
+        if names is None:
+            names = getattr(model, "feature_names_in_", None)
+        self.feature_names = list(names) if names is not None else []
+
+    def predict_proba(self, input_data):
+        if self._cat_features:
+            # CatBoost rejects categorical values stored as floats.
+            data = input_data.astype(object)
+            data[:, self._cat_features] = input_data[:, self._cat_features].astype(np.int64)
+            input_data = data
+        return self.model.predict_proba(input_data, **self._predict_kwargs)
+
+
+class ModelRegistry:
+    """
+    Discovers versioned model files, loads them lazily and hot-swaps new versions.
+
+    Files are discovered in `model_dirs` (earlier directories win). A file named
+    `<name>@<version>.pkl` is an explicit version of `<name>`; a plain
+    `<name>.pkl` (what `train_model` writes) gets its modification time as
+    version and is the default version of `<name>` whenever it exists. Without
+    a plain file, the highest explicit version is the default, comparing
+    numbers in versions numerically (see `version_key`).
+
+    `.cbm` (CatBoost's native format) and `.npz` (NumPy oblivious trees) files
+    are discovered the same way. When a directory holds one model in several
+    formats, only the one `backend` prefers (see `BACKEND_FORMATS`) is used,
+    e.g. `Catboost.cbm` shadows `Catboost.pkl` for the 'catboost' backend.
+
+    The registry survives `os.fork`: a forked child gets fresh locks and its
+    own watcher thread, and keeps the models the parent had already loaded.
+    """
+
+    def __init__(self, model_dirs, default_name, backend="catboost", thread_count=None):
+        if backend not in BACKEND_FORMATS:
+            raise ValueError(f"Unknown backend '{backend}'; expected one of {list(BACKEND_FORMATS)}")
+        self.model_dirs = list(model_dirs)
+        self.default_name = default_name
+        self.formats = BACKEND_FORMATS[backend]
+        self.thread_count = thread_count
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._files = {}      # (name, version) -> path
+        self._defaults = {}   # name -> default version
+        self._loaded = {}     # (name, version) -> LoadedModel
+        self._listeners = []
+        self._watcher = None
+        self._watch_interval = 0
+        self._stop_watching = threading.Event()
+        self._files, self._defaults = self._discover()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Locks may have been held by another thread of the parent at fork time,
+        # and threads are not copied into the child.
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._stop_watching = threading.Event()
+        self._watcher = None
+        self.start_watcher(self._watch_interval)
+
+    def _discover(self):
+        files = {}
+        plain = {}
+        for model_dir in self.model_dirs:
+            if not os.path.isdir(model_dir):
+                continue
+            entries = {}
+            for entry in os.listdir(model_dir):
+                stem, ext = os.path.splitext(entry)
+                if ext in MODEL_LOADERS:
+                    entries.setdefault(stem, []).append(ext)
+            for stem in sorted(entries):
+                ext = min(entries[stem], key=self.formats.index)
+                path = os.path.join(model_dir, stem + ext)
+                if "@" in stem:
+                    name, version = stem.split("@", 1)
+                else:
+                    name, version = stem, f"{os.stat(path).st_mtime_ns:x}"
+                    plain.setdefault(name, version)
+                files.setdefault((name, version), path)
+
+        defaults = {}
+        for name, version in files:
+            if name in plain:
+                defaults[name] = plain[name]
+            elif name not in defaults or version_key(version) > version_key(defaults[name]):
+                defaults[name] = version
+        return files, defaults
+
+    def add_listener(self, callback):
+        """Call `callback(name, old, new)` after the default version of `name` is swapped."""
+        self._listeners.append(callback)
+
+    def list_models(self):
+        """All discovered versions, with their default and loaded flags."""
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "version": version,
+                    "path": path,
+                    "default": self._defaults.get(name) == version,
+                    "loaded": (name, version) in self._loaded,
+                }
+                for (name, version), path in sorted(self._files.items())
+            ]
+
+    def get(self, name=None, version=None):
+        """
+        Return a loaded model, loading it on first use.
+
+        Raises:
+            KeyError: If no such model or version was discovered.
+        """
+        name = name or self.default_name
+        with self._lock:
+            if version is None:
+                if name not in self._defaults:
+                    raise KeyError(f"Unknown model '{name}'")
+                version = self._defaults[name]
+            handle = self._loaded.get((name, version))
+            if handle is not None:
+                return handle
+            path = self._files.get((name, version))
+            if path is None:
+                raise KeyError(f"Unknown version '{version}' of model '{name}'")
+        return self._load(name, version, path)
+
+    def _load(self, name, version, path):
+        # Loads are serialized so concurrent first requests load a file only once.
+        with self._load_lock:
+            handle = self._loaded.get((name, version))
+            if handle is None:
+                loader = MODEL_LOADERS[os.path.splitext(path)[1]]
+                handle = LoadedModel(name, version, path, loader(path), self.thread_count)
+                with self._lock:
+                    self._loaded[(name, version)] = handle
+            return handle
+
+    def refresh(self):
+        """
+        Re-scan the model directories and swap in changed default versions.
+
+        A new default version of an already loaded model is loaded first and
+        swapped in afterwards, so requests keep being served by the old version
+        until the new one is ready.
+
+        Returns:
+            dict: name -> (old version, new version) for every swapped model.
+        """
+        files, defaults = self._discover()
+        swapped = {}
+        for name, version in defaults.items():
+            old = self._defaults.get(name)
+            if old is not None and old != version and (name, old) in self._loaded:
+                self._load(name, version, files[(name, version)])
+                swapped[name] = (old, version)
+
+        with self._lock:
+            self._files, self._defaults = files, defaults
+            # Forget loaded versions whose file is gone, e.g. an overwritten plain file.
+            for key in [key for key in self._loaded if key not in files]:
+                del self._loaded[key]
+
+        for name, (old, new) in swapped.items():
+            for callback in self._listeners:
+                callback(name, old, new)
+        return swapped
+
+    def start_watcher(self, interval):
+        """Poll the model directories every `interval` seconds in a daemon thread."""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._watch_interval = interval
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Model refresh failed: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="model-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        """Stop the polling thread started by `start_watcher`."""
+        self._watch_interval = 0
+        self._stop_watching.set()
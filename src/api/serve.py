@@ -0,0 +1,177 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+
+# Make the `src` directory importable however the server is launched.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Thread-count variables read by the BLAS/OpenMP runtimes when they load.
+NATIVE_THREAD_VARIABLES = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]
+
+
+def configure_threads(inference_threads, model_threads):
+    """
+    Set the per-worker thread limits read by `api.main`. Must run before the
+    API (and with it NumPy and the model libraries) is imported.
+    """
+    os.environ["CHURN_INFERENCE_THREADS"] = str(inference_threads)
+    os.environ["CHURN_MODEL_THREADS"] = str(model_threads)
+    for variable in NATIVE_THREAD_VARIABLES:
+        os.environ.setdefault(variable, str(model_threads))
+
+
+def preload(main):
+    """
+    Load the default version of every model, and its raw-record encoder, in
+    this process. Nothing is scored: CatBoost's and OpenMP's thread pools do
+    not survive `fork`, so they must first start in the workers.
+    """
+    for entry in main.registry.list_models():
+        if entry["default"]:
+            main._raw_encoder(main.registry.get(entry["name"], entry["version"]))
+
+
+def close(main):
+    """
+    Flush what a worker still holds in memory before it exits. Workers leave
+    through `os._exit`, which skips the `atexit` handlers that would do this.
+    """
+    if main.prediction_logger is not None:
+        main.prediction_logger.close()
+
+
+def bind_socket(host, port, backlog=2048):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Accepted connections inherit this. Without it, Nagle's algorithm holds
+    # back small responses for up to ~40 ms waiting for the client's ACK.
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, log_level, reload=None):
+    import uvicorn
+
+    # The supervisor's handlers are inherited; uvicorn installs its own while it
+    # serves, then restores these and raises the signal that stopped it again.
+    # Exiting through SystemExit (rather than being killed by the default
+    # action) lets the worker flush its prediction log first.
+    def exit_worker(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, exit_worker)
+    signal.signal(signal.SIGINT, exit_worker)
+    # SIGHUP (forwarded by the supervisor) reloads the models. Loading can take
+    # a while, so it runs in a thread rather than in the signal handler.
+    if reload is not None:
+        signal.signal(signal.SIGHUP, lambda signum, frame: threading.Thread(
+            target=reload, name="model-reload", daemon=True).start())
+    gc.enable()
+    uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+
+
+def serve(app, sock, workers, log_level="info", restart_delay=1.0, reload=None, shutdown=None):
+    """
+    Fork `workers` uvicorn processes accepting on the shared `sock`, restart
+    any that die, and stop them all on SIGTERM or SIGINT. SIGHUP is forwarded
+    to every worker, which then calls `reload`; a worker calls `shutdown` once
+    uvicorn has stopped.
+    """
+    children = {}  # pid -> worker index
+    stopping = False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                run_worker(app, sock, log_level, reload)
+            except SystemExit as error:
+                status = error.code or 0
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                try:
+                    if shutdown is not None:
+                        shutdown()
+                except BaseException:
+                    traceback.print_exc()
+                    status = status or 1
+                os._exit(status)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    def forward(signum, frame):
+        for pid in children:
+            os.kill(pid, signum)
+
+    for index in range(workers):
+        spawn(index)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, forward)
+    print(f"Serving on {sock.getsockname()} with {workers} workers: {sorted(children)}")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"Worker {pid} exited (status {status}); restarting it.")
+            time.sleep(restart_delay)
+            spawn(index)
+
+
+def main(argv=None):
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(
+        description="Serve the churn API from worker processes forked after the models are loaded.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=cpu_count, help="Worker processes (default: all cores)")
+    parser.add_argument('--inference-threads', type=int, default=1,
+                        help="Concurrent predict_proba calls per worker")
+    parser.add_argument('--model-threads', type=int, default=None,
+                        help="Threads per predict_proba call (default: cores / workers)")
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args(argv)
+
+    configure_threads(args.inference_threads, args.model_threads or max(1, cpu_count // args.workers))
+    # A worker's POST /models/reload signals this process, which forwards it.
+    os.environ["CHURN_SUPERVISOR_PID"] = str(os.getpid())
+
+    # No collection runs while the models load; afterwards every object is
+    # moved to the permanent generation, so collections in the workers never
+    # write to (and copy) the pages they share with this process.
+    gc.disable()
+    from api import main as app_module
+
+    preload(app_module)
+    gc.collect()
+    gc.freeze()
+
+    sock = bind_socket(args.host, args.port)
+    serve(app_module.app, sock, args.workers, args.log_level, reload=app_module.registry.refresh,
+          shutdown=lambda: close(app_module))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bump whenever the on-disk layout changes. Version 1 stored all numeric
+# columns of a frame as a single `<name>.npy` block; it is still read.
+FEATURE_STORE_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+MANIFEST = "manifest.json"
+
+
+def _read_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {"version": FEATURE_STORE_VERSION, "tables": {}}
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("version") not in SUPPORTED_VERSIONS:
+        raise ValueError(f"Unsupported feature store version {manifest.get('version')} in {directory}; "
+                         f"expected one of {SUPPORTED_VERSIONS}.")
+    manifest["version"] = FEATURE_STORE_VERSION
+    return manifest
+
+
+def save_features(data, directory, name, ids=None):
+    """
+    Write a processed frame (or target series) as raw `.npy` arrays plus a
+    column manifest, so it can be memory-mapped back without parsing.
+
+    Numeric columns are stored as one C-ordered 2D array per dtype, e.g.
+    `<name>.float64.npy` for the numerics and `<name>.uint8.npy` for the
+    dummies, so every column keeps its own dtype (no text round-trip, no
+    precision loss, no upcasting). Categorical columns, as produced by the
+    'native' encoding, are stored as a separate array of integer codes.
+
+    Args:
+        data (pd.DataFrame or pd.Series): Table to store.
+        directory (str): Store directory; other tables in it are kept.
+        name (str): Table name, e.g. 'train', 'test' or 'churn'.
+        ids (array-like, optional): Row identifiers (e.g. user_id) stored alongside.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = _read_manifest(directory)
+    table = {}
+
+    if isinstance(data, pd.Series):
+        values = data.to_numpy()
+        np.save(os.path.join(directory, f"{name}.npy"), values)
+        table.update(kind="series", series_name=data.name, dtype=str(values.dtype), shape=list(values.shape))
+    else:
+        categorical = [col for col in data.columns if isinstance(data[col].dtype, pd.CategoricalDtype)]
+        numeric = [col for col in data.columns if col not in categorical]
+        blocks = {}  # dtype -> columns, in order of first appearance
+        for col in numeric:
+            blocks.setdefault(str(data[col].dtype), []).append(col)
+        table.update(kind="frame", columns=numeric, rows=len(data), blocks=[])
+        for dtype, columns in blocks.items():
+            values = np.ascontiguousarray(data[columns].to_numpy(dtype=dtype))
+            np.save(os.path.join(directory, f"{name}.{dtype}.npy"), values)
+            table["blocks"].append({"dtype": dtype, "columns": columns})
+        if categorical:
+            codes = np.column_stack([data[col].cat.codes.to_numpy().astype(np.int16) for col in categorical])
+            np.save(os.path.join(directory, f"{name}.codes.npy"), codes)
+            table["categorical"] = {col: len(data[col].cat.categories) for col in categorical}
+
+    if ids is not None:
+        np.save(os.path.join(directory, f"{name}.ids.npy"), np.asarray(ids).astype(str))
+        table["ids"] = True
+
+    manifest["tables"][name] = table
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def load_features(directory, name, mmap=True):
+    """
+    Load a table written by `save_features`.
+
+    With `mmap=True` the numeric blocks are memory-mapped read-only and wrapped
+    without a copy, so loading is near-instant whatever the table size.
+
+    Returns:
+        pd.DataFrame or pd.Series: The stored table.
+    """
+    table = _read_manifest(directory)["tables"][name]
+    mmap_mode = "r" if mmap else None
+
+    if table["kind"] == "series":
+        values = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+        return pd.Series(values, name=table["series_name"], copy=False)
+
+    if "blocks" in table:
+        frames = [
+            pd.DataFrame(np.load(os.path.join(directory, f"{name}.{block['dtype']}.npy"), mmap_mode=mmap_mode),
+                         columns=block["columns"], copy=False)
+            for block in table["blocks"]
+        ]
+        if len(frames) == 1:
+            frame = frames[0]
+        elif frames:
+            frame = pd.concat(frames, axis=1, copy=False)
+        else:
+            frame = pd.DataFrame(index=pd.RangeIndex(table["rows"]))
+        if list(frame.columns) != table["columns"]:
+            frame = frame[table["columns"]]
+    else:
+        # Version 1: a single block holding every numeric column.
+        values = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+        frame = pd.DataFrame(values, columns=table["columns"], copy=False)
+    categorical = table.get("categorical")
+    if categorical:
+        codes = np.load(os.path.join(directory, f"{name}.codes.npy"), mmap_mode=mmap_mode)
+        for j, (col, n_categories) in enumerate(categorical.items()):
+            frame[col] = pd.Categorical.from_codes(codes[:, j], categories=range(n_categories))
+    return frame
+
+
+def load_ids(directory, name, mmap=True):
+    """Row identifiers stored with a table, or None."""
+    path = os.path.join(directory, f"{name}.ids.npy")
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+
+def table_files(directory, name):
+    """Files backing a table (without the shared manifest)."""
+    return [
+        os.path.join(directory, entry) for entry in sorted(os.listdir(directory))
+        if entry.startswith(f"{name}.") and entry.endswith(".npy")
+    ]
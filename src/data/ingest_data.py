@@ -1,10 +1,59 @@
 import pandas as pd
+import numpy as np
 import os
 
-def load_data(raw_data_dir):
+# Explicit schema for the raw Expresso files. Strings with few distinct values
+# are read as categoricals and numerics as float32, which is several times
+# smaller than the inferred object/float64 dtypes.
+CATEGORICAL_DTYPES = {col: 'category' for col in ['REGION', 'TENURE', 'TOP_PACK', 'MRG']}
+NUMERIC_COLUMNS = [
+    'MONTANT', 'FREQUENCE_RECH', 'REVENUE', 'ARPU_SEGMENT', 'FREQUENCE', 'DATA_VOLUME',
+    'ON_NET', 'ORANGE', 'TIGO', 'ZONE1', 'ZONE2', 'REGULARITY', 'FREQ_TOP_PACK',
+]
+RAW_DTYPES = {
+    'user_id': 'object',
+    'CHURN': 'int8',
+    **CATEGORICAL_DTYPES,
+    **{col: np.float32 for col in NUMERIC_COLUMNS},
+}
+# Columns preprocessing always drops, so the streaming reader never parses them.
+SKIPPED_COLUMNS = ['ZONE1', 'ZONE2', 'MRG', 'REVENUE']
+
+DEFAULT_CHUNKSIZE = 200_000
+
+
+def read_csv_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Stream a raw Expresso CSV in fixed-size, typed chunks.
+
+    Args:
+        path (str): CSV file to read.
+        chunksize (int): Number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: Chunks using `RAW_DTYPES`, without the `SKIPPED_COLUMNS`.
+    """
+    reader = pd.read_csv(
+        path,
+        usecols=lambda col: col not in SKIPPED_COLUMNS,
+        dtype=RAW_DTYPES,
+        chunksize=chunksize,
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+
+def load_data(raw_data_dir, chunksize=None):
     """
     Load training, test, and sample submission datasets from the data/raw directory.
 
+    Args:
+        raw_data_dir (str): Directory holding the raw CSV files.
+        chunksize (int, optional): When given, train and test are streamed as
+            iterators of typed chunks of this many rows (see `read_csv_chunks`),
+            so peak memory depends on the chunk size rather than the file size.
+
     Returns:
         train (pd.DataFrame): Training dataset
         test (pd.DataFrame): Test dataset
@@ -15,10 +64,12 @@ def load_data(raw_data_dir):
     test_path = os.path.join(raw_data_dir, "test.csv")
     sample_sub_path = os.path.join(raw_data_dir, "SampleSubmission.csv")
 
-    train = pd.read_csv(train_path)
-    test = pd.read_csv(test_path)
+    if chunksize:
+        train = read_csv_chunks(train_path, chunksize)
+        test = read_csv_chunks(test_path, chunksize)
+    else:
+        train = pd.read_csv(train_path)
+        test = pd.read_csv(test_path)
     sample_sub = pd.read_csv(sample_sub_path)
 
     return train, test, sample_sub
-
-
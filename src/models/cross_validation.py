@@ -0,0 +1,158 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import log_loss, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from models.trainer import build_model, fit_model, prepare_model_input
+
+CV_CACHE_DIR = "models/cv"
+
+
+def data_fingerprint(*frames):
+    """
+    Content hash of one or more DataFrames/Series (values, columns and order).
+    """
+    digest = hashlib.sha256()
+    for frame in frames:
+        if frame is None:
+            digest.update(b"none")
+            continue
+        names = list(frame.columns) if isinstance(frame, pd.DataFrame) else [frame.name]
+        digest.update(json.dumps([str(name) for name in names]).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def cv_key(model_name, params, n_splits, seed, fingerprint):
+    """Cache key of a cross-validation run: model config + fold layout + data."""
+    config = {
+        "model": model_name,
+        "params": params,
+        "n_splits": n_splits,
+        "seed": seed,
+        "data": fingerprint,
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _fit_fold(model_name, params, n_threads, X, y, train_idx, val_idx, X_test):
+    model = build_model(model_name, n_threads)
+    if params:
+        model.set_params(**params)
+
+    start = time.perf_counter()
+    fit_model(model, X.iloc[train_idx], y.iloc[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    val_pred = model.predict_proba(prepare_model_input(model, X.iloc[val_idx]))[:, 1]
+    test_pred = (model.predict_proba(prepare_model_input(model, X_test))[:, 1]
+                 if X_test is not None else np.empty(0))
+    y_val = y.iloc[val_idx]
+    return {
+        "val_pred": val_pred,
+        "test_pred": test_pred,
+        "log_loss": log_loss(y_val, val_pred, labels=[0, 1]),
+        "roc_auc": roc_auc_score(y_val, val_pred),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def cross_validate_model(model_name, train, target, test=None, params=None, n_splits=5, seed=42,
+                         n_jobs=None, cache_dir=CV_CACHE_DIR):
+    """
+    Stratified K-fold evaluation of one model, with folds trained in parallel.
+
+    Out-of-fold and per-fold test predictions are stored under
+    `cache_dir/<key>/`, where the key combines the model name, its parameters,
+    the fold layout and a fingerprint of the data. Folds already present in the
+    cache are reused instead of retrained.
+
+    Folds run in spawned rather than forked processes, as a child forked after
+    OpenMP (libgomp) has started its threads in this process can hang. Every
+    fold task pickles the full `train`, `target` and `test` to its worker, so
+    memory grows by about one copy of them per worker.
+
+    Args:
+        model_name (str): One of `trainer.MODEL_NAMES`.
+        train (pd.DataFrame): Preprocessed features.
+        target (pd.Series): CHURN labels.
+        test (pd.DataFrame, optional): Rows to predict with every fold model.
+        params (dict, optional): Parameters set on the model before fitting.
+        n_splits (int): Number of folds.
+        seed (int): Shuffling seed of the fold split.
+        n_jobs (int, optional): Core budget shared by the folds. Defaults to all cores.
+        cache_dir (str): Root of the fold cache.
+
+    Returns:
+        dict: Per-fold and out-of-fold log loss/AUC plus the cache paths.
+            `oof.npy` holds one prediction per training row and `test_folds.npy`
+            one row of test predictions per fold.
+    """
+    params = params or {}
+    target = target.reset_index(drop=True)
+    train = train.reset_index(drop=True)
+    key = cv_key(model_name, params, n_splits, seed, data_fingerprint(train, target, test))
+    run_dir = os.path.join(cache_dir, key)
+    os.makedirs(run_dir, exist_ok=True)
+
+    splits = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(train, target))
+    fold_paths = [os.path.join(run_dir, f"fold_{k}.npz") for k in range(n_splits)]
+    todo = [k for k in range(n_splits) if not os.path.exists(fold_paths[k])]
+
+    if todo:
+        budget = n_jobs or os.cpu_count() or 1
+        workers = min(len(todo), budget)
+        n_threads = max(1, budget // workers)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {
+                k: executor.submit(_fit_fold, model_name, params, n_threads, train, target,
+                                   splits[k][0], splits[k][1], test)
+                for k in todo
+            }
+            for k, future in futures.items():
+                result = future.result()
+                np.savez(fold_paths[k], val_idx=splits[k][1], val_pred=result["val_pred"],
+                         test_pred=result["test_pred"], log_loss=result["log_loss"],
+                         roc_auc=result["roc_auc"], fit_seconds=result["fit_seconds"])
+
+    oof = np.empty(len(train), dtype=np.float64)
+    test_folds = []
+    folds = []
+    for k, path in enumerate(fold_paths):
+        with np.load(path) as fold:
+            oof[fold["val_idx"]] = fold["val_pred"]
+            test_folds.append(fold["test_pred"])
+            folds.append({
+                "fold": k,
+                "log_loss": float(fold["log_loss"]),
+                "roc_auc": float(fold["roc_auc"]),
+                "fit_seconds": float(fold["fit_seconds"]),
+                "cached": k not in todo,
+            })
+
+    oof_path = os.path.join(run_dir, "oof.npy")
+    test_path = os.path.join(run_dir, "test_folds.npy")
+    np.save(oof_path, oof)
+    np.save(test_path, np.vstack(test_folds))
+
+    summary = {
+        "model": model_name,
+        "key": key,
+        "params": params,
+        "n_splits": n_splits,
+        "folds": folds,
+        "log_loss": log_loss(target, oof, labels=[0, 1]),
+        "roc_auc": roc_auc_score(target, oof),
+        "oof_path": oof_path,
+        "test_path": test_path,
+    }
+    with open(os.path.join(run_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
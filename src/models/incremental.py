@@ -0,0 +1,150 @@
+import glob
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from models.serialization import MODEL_LOADERS, is_catboost, is_xgboost, load_model
+from models.trainer import prepare_model_input, save_model
+from utils.instrumentation import measure
+from utils.stages import file_digest, publish
+
+# Models that can continue boosting from their saved state.
+INCREMENTAL_MODELS = ["Catboost", "XGBoost"]
+BACKUP_DIR = "backup"
+
+
+def continue_training(model, X, y, extra_rounds, n_threads=None):
+    """
+    Fit `extra_rounds` more boosting rounds on top of a fitted CatBoost or
+    XGBoost model (CatBoost `init_model`, XGBoost `xgb_model`).
+
+    The result is a new model holding the old trees followed by the new ones;
+    `model` itself is not modified. The learning rate of `model` is kept, so
+    the new trees are on the same scale as the old ones.
+    """
+    if is_catboost(model):
+        updated = type(model)(**{**model.get_params(), "iterations": extra_rounds,
+                                 "learning_rate": model.get_all_params()["learning_rate"],
+                                 "thread_count": n_threads or -1, "allow_writing_files": False})
+        return updated.fit(prepare_model_input(updated, X), y, init_model=model)
+    if is_xgboost(model):
+        updated = type(model)(**model.get_params())
+        # There is no evaluation set to stop early on.
+        updated.set_params(n_estimators=extra_rounds, n_jobs=n_threads, early_stopping_rounds=None)
+        return updated.fit(prepare_model_input(updated, X), y, xgb_model=model.get_booster(), verbose=False)
+    raise ValueError(f"{type(model).__name__} models cannot be trained incrementally.")
+
+
+def backup_model(model_name, model_dir="models"):
+    """
+    Copy every saved format of `model_name` to `<model_dir>/backup/`, suffixed
+    with the current time.
+
+    Returns:
+        list: The backup files written.
+    """
+    backup_dir = os.path.join(model_dir, BACKUP_DIR)
+    os.makedirs(backup_dir, exist_ok=True)
+    stamp = time.strftime('%Y%m%dT%H%M%S')
+    backups = []
+    for ext in MODEL_LOADERS:
+        path = os.path.join(model_dir, f"{model_name}{ext}")
+        if os.path.exists(path):
+            backups.append(os.path.join(backup_dir, f"{model_name}-{stamp}{ext}"))
+            shutil.copy2(path, backups[-1])
+    return backups
+
+
+def is_superseded(path, model_name, model_dir="models"):
+    """
+    Whether the model saved at `path` was already replaced by an incremental
+    update, i.e. is identical to one of the backups of `model_name`.
+    """
+    digest = file_digest(path)
+    ext = os.path.splitext(path)[1]
+    backups = glob.glob(os.path.join(model_dir, BACKUP_DIR, f"{model_name}-*{ext}"))
+    return any(file_digest(backup) == digest for backup in backups)
+
+
+def update_models(features, target, model_dir="models", extra_rounds=100, holdout_size=0.2,
+                  model_names=INCREMENTAL_MODELS, n_jobs=None, seed=42, summary_path=None):
+    """
+    Warm-start the saved boosting models on a new slice of labelled rows.
+
+    The slice is split into fitting rows and a stratified holdout. Each model
+    in `model_dir` gets `extra_rounds` more boosting rounds on the fitting rows
+    (see `continue_training`) and is promoted, i.e. written over its saved
+    files, only if its holdout log loss is no worse than the current model's.
+    The files it replaces are first copied to `<model_dir>/backup/`. New files
+    replace the old ones atomically, so a serving process polling `model_dir`
+    never loads a partly written model.
+
+    Args:
+        features (pd.DataFrame): The slice, encoded with the preprocessor (and
+            encoding) the saved models were trained with.
+        target (pd.Series): CHURN labels of the slice.
+        model_dir (str): Where the current models are saved, as `<name>.pkl`.
+        extra_rounds (int): Boosting rounds added to every model.
+        holdout_size (float): Fraction of the slice held out for the comparison.
+        model_names (list): Models to update; missing ones are skipped.
+        n_jobs (int, optional): Threads per model. Defaults to all cores.
+        seed (int): Seed of the holdout split.
+        summary_path (str, optional): Where to write the summary as JSON.
+
+    Returns:
+        dict: Per-model holdout log loss before and after, fit time, whether
+            the update was promoted and the backups made.
+    """
+    from sklearn.metrics import log_loss
+    from sklearn.model_selection import train_test_split
+
+    X_fit, X_holdout, y_fit, y_holdout = train_test_split(features, target, test_size=holdout_size,
+                                                          random_state=seed, stratify=target)
+
+    def holdout_log_loss(model):
+        proba = model.predict_proba(prepare_model_input(model, X_holdout))[:, 1]
+        return float(log_loss(y_holdout, proba, labels=[0, 1]))
+
+    summary = {}
+    for model_name in model_names:
+        path = os.path.join(model_dir, f"{model_name}.pkl")
+        if not os.path.exists(path):
+            print(f"[{model_name}] no saved model at {path}; skipped")
+            continue
+
+        current = load_model(path)
+        baseline = holdout_log_loss(current)
+        with measure() as fit:
+            updated = continue_training(current, X_fit, y_fit, extra_rounds, n_jobs)
+        updated_loss = holdout_log_loss(updated)
+
+        promoted = updated_loss <= baseline
+        backups = []
+        if promoted:
+            backups = backup_model(model_name, model_dir)
+            with tempfile.TemporaryDirectory(dir=model_dir) as staging:
+                for staged in save_model(updated, model_name, staging):
+                    publish(staged, os.path.join(model_dir, os.path.basename(staged)))
+
+        summary[model_name] = {
+            "rows": len(X_fit),
+            "holdout_rows": len(X_holdout),
+            "extra_rounds": extra_rounds,
+            "fit_seconds": fit["wall_seconds"],
+            "fit_cpu_seconds": fit["cpu_seconds"],
+            "fit_peak_rss_mb": fit["peak_rss_mb"],
+            "baseline_log_loss": baseline,
+            "log_loss": updated_loss,
+            "promoted": promoted,
+            "backups": backups,
+        }
+        print(f"[{model_name}] holdout log loss {baseline:.5f} -> {updated_loss:.5f} "
+              f"({'promoted' if promoted else 'kept the current model'})")
+
+    if summary_path:
+        os.makedirs(os.path.dirname(summary_path) or ".", exist_ok=True)
+        with open(summary_path, "w") as f:
+            json.dump(summary, f, indent=2)
+    return summary
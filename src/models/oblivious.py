@@ -0,0 +1,191 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+
+# CatBoost's JSON `nan_value_treatment` -> whether NaN compares as +inf. 'AsTrue'
+# is nan_mode='Max', 'AsFalse' nan_mode='Min' and 'AsIs' nan_mode='Forbidden'
+# (no NaN was seen in training; NaN then never exceeds a border).
+NAN_AS_MAX = {'AsTrue': True, 'AsFalse': False, 'AsIs': False}
+
+# CatBoost trees are at most 16 levels deep, so leaf indices fit in 16 bits.
+MAX_DEPTH = 16
+
+# Rows evaluated at a time. Keeps the (splits x rows) and (trees x rows)
+# intermediates around a megabyte, i.e. in cache, whatever the batch size.
+CHUNK_ROWS = 1024
+
+
+class ObliviousTreeModel:
+    """
+    CatBoost binary classifier evaluated with NumPy from flat arrays.
+
+    CatBoost trees are oblivious: all nodes on one level of a tree test the
+    same (feature, border) split, so the leaf a row lands in is the integer
+    whose bit `d` is `x[feature] > border` for the split of level `d`. A batch
+    is evaluated by binarizing every distinct split once, assembling all leaf
+    indices with shifts and ORs, and summing the gathered leaf values. Arrays
+    are laid out trees x rows, so every gather copies contiguous rows.
+
+    Arrays:
+        split_features, split_borders (S,): the distinct splits.
+        nan_as_max (S,): splits whose feature treats NaN as +inf (CatBoost's
+            nan_mode='Max'); otherwise NaN never exceeds a border.
+        tree_splits (n_trees, depth): split tested on each level, bit 0 first.
+        leaf_values (n_trees, 2**depth): raw leaf values.
+
+    Trees shallower than `depth` are padded with a split whose border is +inf,
+    which never fires, so their leaves stay in the lower half of the row.
+    """
+
+    def __init__(self, split_features, split_borders, nan_as_max, tree_splits, leaf_values, scale, bias,
+                 feature_names):
+        self.split_features = np.asarray(split_features, dtype=np.intp)
+        # CatBoost compares features as float32 against float32 borders.
+        self.split_borders = np.asarray(split_borders, dtype=np.float32)
+        self.nan_as_max = np.asarray(nan_as_max, dtype=bool)
+        self.tree_splits = np.asarray(tree_splits, dtype=np.intp)
+        self.leaf_values = np.asarray(leaf_values, dtype=np.float64)
+        self.scale = float(scale)
+        self.bias = float(bias)
+        self.feature_names_ = [str(name) for name in feature_names]
+        self.depth = self.tree_splits.shape[1]
+        if self.depth > MAX_DEPTH:
+            raise ValueError(f"Trees deeper than {MAX_DEPTH} levels are not supported (got {self.depth}).")
+        # Narrowest integer holding a leaf index.
+        self._leaf_dtype = np.uint8 if self.depth <= 8 else np.uint16
+
+    @classmethod
+    def from_catboost(cls, model):
+        """
+        Convert a fitted `CatBoostClassifier`.
+
+        Raises:
+            ValueError: For models with categorical, text or embedding splits
+                (e.g. trained on the 'native' encoding), more than two classes
+                or an unknown NaN treatment.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'model.json')
+            model.save_model(path, format='json')
+            with open(path) as f:
+                state = json.load(f)
+        return cls.from_json(state)
+
+    @classmethod
+    def from_json(cls, state):
+        """Build from CatBoost's JSON model format."""
+        scale, bias = state.get('scale_and_bias', [1.0, [0.0]])
+        if isinstance(bias, list):
+            if len(bias) != 1:
+                raise ValueError("Only binary classifiers can be converted.")
+            bias = bias[0]
+
+        float_features = state['features_info'].get('float_features', [])
+        flat_index = {feature['feature_index']: feature['flat_feature_index'] for feature in float_features}
+        nan_max = {}
+        for feature in float_features:
+            treatment = feature.get('nan_value_treatment', 'AsIs')
+            if treatment not in NAN_AS_MAX:
+                raise ValueError(f"Unsupported nan_value_treatment {treatment!r} of feature "
+                                 f"{feature.get('feature_id') or feature['feature_index']}.")
+            nan_max[feature['feature_index']] = NAN_AS_MAX[treatment]
+        n_features = max(flat_index.values()) + 1 if flat_index else 0
+        feature_names = [str(i) for i in range(n_features)]
+        for feature in float_features:
+            feature_names[feature['flat_feature_index']] = feature.get('feature_id') or str(feature['flat_feature_index'])
+
+        trees = state['oblivious_trees']
+        # A single-leaf tree is written with "splits": null. Every tree gets at
+        # least one level, padded like any shallower tree.
+        tree_levels = [tree['splits'] or [] for tree in trees]
+        depth = max([1] + [len(levels) for levels in tree_levels])
+        splits = {}  # (flat feature, border) -> split index
+        features, borders, nan_as_max = [], [], []
+
+        def split_index(feature, border, as_max):
+            key = (feature, border)
+            if key not in splits:
+                splits[key] = len(features)
+                features.append(feature)
+                borders.append(border)
+                nan_as_max.append(as_max)
+            return splits[key]
+
+        never = split_index(0, np.inf, False)
+        tree_splits = np.full((len(trees), depth), never, dtype=np.intp)
+        leaf_values = np.zeros((len(trees), 2 ** depth), dtype=np.float64)
+        for t, (tree, levels) in enumerate(zip(trees, tree_levels)):
+            for d, split in enumerate(levels):
+                if split['split_type'] != 'FloatFeature':
+                    raise ValueError(f"Unsupported split type {split['split_type']}; only models trained "
+                                     f"on numeric (e.g. one-hot 'dummies') features can be converted.")
+                feature = split['float_feature_index']
+                tree_splits[t, d] = split_index(flat_index[feature], split['border'], nan_max[feature])
+            values = tree['leaf_values']
+            if len(values) != 2 ** len(levels):
+                raise ValueError("Only binary classifiers can be converted.")
+            leaf_values[t, :len(values)] = values
+
+        return cls(features, borders, nan_as_max, tree_splits, leaf_values, scale, bias, feature_names)
+
+    def save(self, path):
+        """Write the arrays to an uncompressed `.npz` file."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                split_features=self.split_features,
+                split_borders=self.split_borders,
+                nan_as_max=self.nan_as_max,
+                tree_splits=self.tree_splits,
+                leaf_values=self.leaf_values,
+                scale_and_bias=np.array([self.scale, self.bias]),
+                feature_names=np.array(self.feature_names_),
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            scale, bias = arrays['scale_and_bias']
+            return cls(arrays['split_features'], arrays['split_borders'], arrays['nan_as_max'],
+                       arrays['tree_splits'], arrays['leaf_values'], scale, bias, arrays['feature_names'])
+
+    def _raw_chunk(self, X):
+        values = np.ascontiguousarray(X.T)[self.split_features]
+        if self.nan_as_max.any():
+            values = np.where(np.isnan(values) & self.nan_as_max[:, None], np.inf, values)
+        bits = (values > self.split_borders[:, None]).view(np.uint8)
+        if self._leaf_dtype is not np.uint8:
+            bits = bits.astype(self._leaf_dtype)
+
+        # Leaf index of every (tree, row), one byte up to depth 8 and two beyond.
+        leaves = np.take(bits, self.tree_splits[:, 0], axis=0)
+        level = np.empty_like(leaves)
+        for d in range(1, self.depth):
+            np.take(bits, self.tree_splits[:, d], axis=0, out=level)
+            np.left_shift(level, d, out=level)
+            np.bitwise_or(leaves, level, out=leaves)
+        return np.take_along_axis(self.leaf_values, leaves.astype(np.intp), axis=1).sum(axis=0)
+
+    def predict_raw(self, X):
+        """Raw scores (log-odds of churn) for a 2D feature matrix."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names_):
+            raise ValueError(f"Expected a 2D matrix with {len(self.feature_names_)} columns, got shape {X.shape}.")
+        raw = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_ROWS):
+            raw[start:start + CHUNK_ROWS] = self._raw_chunk(X[start:start + CHUNK_ROWS])
+        return self.scale * raw + self.bias
+
+    def predict_proba(self, X):
+        """Class probabilities, shaped (n_rows, 2) like `CatBoostClassifier.predict_proba`."""
+        churn = 1.0 / (1.0 + np.exp(-self.predict_raw(X)))
+        return np.column_stack([1.0 - churn, churn])
+
+
+def export_oblivious(model, path):
+    """Convert a fitted `CatBoostClassifier` and save it as `.npz`."""
+    ObliviousTreeModel.from_catboost(model).save(path)
+    return path
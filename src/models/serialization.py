@@ -0,0 +1,123 @@
+import argparse
+import os
+import sys
+
+# CatBoost's own binary model format. Loading it needs neither joblib nor the
+# pickle machinery, and the file can be read by the CatBoost C++ and CLI tools.
+CATBOOST_FORMAT = ".cbm"
+# Flat oblivious-tree arrays scored with NumPy alone (see `models.oblivious`).
+NUMPY_FORMAT = ".npz"
+
+
+def load_catboost(path):
+    """Load a CatBoost classifier saved in the native `.cbm` format."""
+    from catboost import CatBoostClassifier
+
+    return CatBoostClassifier().load_model(path)
+
+
+def load_pickle(path):
+    """Load a model saved with `joblib.dump`."""
+    import joblib
+
+    return joblib.load(path)
+
+
+def load_oblivious(path):
+    """Load a CatBoost model exported to `.npz`; CatBoost itself is not imported."""
+    from models.oblivious import ObliviousTreeModel
+
+    return ObliviousTreeModel.load(path)
+
+
+# File extensions a model can be loaded from, and the loader for each.
+MODEL_LOADERS = {
+    CATBOOST_FORMAT: load_catboost,
+    ".pkl": load_pickle,
+    NUMPY_FORMAT: load_oblivious,
+}
+
+# Scoring backends and the formats each one prefers, best first: when a
+# directory holds the same model in several formats, the first one is used.
+# 'catboost' scores with the CatBoost runtime, which is fastest on large
+# batches; 'numpy' scores CatBoost models with `models.oblivious`, which has
+# less per-call overhead and does not load CatBoost at all.
+BACKEND_FORMATS = {
+    "catboost": [CATBOOST_FORMAT, ".pkl", NUMPY_FORMAT],
+    "numpy": [NUMPY_FORMAT, CATBOOST_FORMAT, ".pkl"],
+}
+
+
+def load_model(path, backend="catboost"):
+    """
+    Load a fitted model, choosing the loader from the file extension.
+
+    With the 'numpy' backend, a CatBoost model stored as `.cbm` or `.pkl` is
+    converted on load; other models are returned as they are.
+
+    Raises:
+        ValueError: If the extension is not one of `MODEL_LOADERS`.
+    """
+    ext = os.path.splitext(path)[1]
+    if ext not in MODEL_LOADERS:
+        raise ValueError(f"Unsupported model file: {path} (expected one of {list(MODEL_LOADERS)})")
+    model = MODEL_LOADERS[ext](path)
+    if backend == "numpy" and is_catboost(model):
+        from models.oblivious import ObliviousTreeModel
+
+        model = ObliviousTreeModel.from_catboost(model)
+    return model
+
+
+def is_catboost(model):
+    """True for CatBoost models, without importing CatBoost."""
+    return type(model).__module__.split(".")[0] == "catboost"
+
+
+def is_xgboost(model):
+    """True for XGBoost models, without importing XGBoost."""
+    return type(model).__module__.split(".")[0] == "xgboost"
+
+
+def export_catboost(model_path, output_path=None, format=CATBOOST_FORMAT):
+    """
+    Convert a CatBoost model to the native `.cbm` format or to `.npz` arrays.
+
+    Args:
+        model_path (str): A `.pkl` file written by `train_model`, or a `.cbm` file.
+        output_path (str, optional): Defaults to `model_path` with the extension of `format`.
+        format (str): `CATBOOST_FORMAT` or `NUMPY_FORMAT`.
+
+    Returns:
+        str: The path written.
+    """
+    model = load_model(model_path)
+    if not is_catboost(model):
+        raise ValueError(f"{model_path} holds a {type(model).__name__}, not a CatBoost model")
+    output_path = output_path or os.path.splitext(model_path)[0] + format
+    if format == NUMPY_FORMAT:
+        from models.oblivious import export_oblivious
+
+        export_oblivious(model, output_path)
+    else:
+        model.save_model(output_path)
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export CatBoost models to the native .cbm format or .npz arrays.")
+    parser.add_argument('models', nargs='+', help="CatBoost models (.pkl or .cbm)")
+    parser.add_argument('--format', choices=[CATBOOST_FORMAT, NUMPY_FORMAT], default=CATBOOST_FORMAT)
+    parser.add_argument('--output', default=None, help="Output file (only with a single model)")
+    args = parser.parse_args(argv)
+    if args.output and len(args.models) > 1:
+        parser.error("--output requires a single model")
+
+    for model_path in args.models:
+        print(f"{model_path} -> {export_catboost(model_path, args.output, args.format)}")
+
+
+if __name__ == '__main__':
+    # Run as a script: make the `src` modules (models.oblivious) importable.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
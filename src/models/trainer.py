@@ -1,44 +1,223 @@
-import numpy as np
 import pandas as pd
-import matplotlib as plt
-import seaborn as sns
-from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler, MinMaxScaler, OrdinalEncoder, PolynomialFeatures
-from sklearn.model_selection import train_test_split, cross_validate, learning_curve, RandomizedSearchCV,GridSearchCV, StratifiedKFold, cross_val_score, cross_val_predict,KFold
-from sklearn.metrics import accuracy_score, precision_score,make_scorer, recall_score, f1_score, classification_report, roc_auc_score, confusion_matrix, ConfusionMatrixDisplay
-from sklearn.pipeline import Pipeline
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import StratifiedKFold, train_test_split
-from sklearn.metrics import f1_score
-from catboost import CatBoostClassifier
-from xgboost import XGBClassifier
+from models.serialization import CATBOOST_FORMAT, NUMPY_FORMAT, is_catboost, is_xgboost
+from preprocess.preprocess import sparse_from_native
+from utils.instrumentation import measure
+import json
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 import joblib
 import warnings
 warnings.filterwarnings('ignore')
 import warnings
 warnings.filterwarnings("ignore", message="Dask dataframe query planning is disabled because dask-expr is not installed.")
 
-def train_model(train,target):
-    X_train, X_val, Y_train, Y_val = train_test_split(train, target, test_size=0.2, random_state=42)
-   # Define models
-    models = {
-    "Logistic_Regression": LogisticRegression(),
-    "Catboost": CatBoostClassifier(verbose=0),
-    "Random_Forest": RandomForestClassifier(),
-    "XGBoost": XGBClassifier(verbosity=0, use_label_encoder=False),
+MODEL_NAMES = ["Logistic_Regression", "Catboost", "Random_Forest", "XGBoost"]
+
+# scikit-learn, CatBoost and XGBoost take seconds to import between them, so
+# they are imported where they are used: scoring a CatBoost model (predict.py)
+# never loads XGBoost or the scikit-learn metrics.
+
+
+def build_model(model_name, n_threads=None, params=None):
+    """
+    Create an unfitted candidate model.
+
+    Args:
+        model_name (str): One of `MODEL_NAMES`.
+        n_threads (int, optional): Maximum number of threads the model may use.
+            Defaults to the library's own setting.
+        params (dict, optional): Hyperparameters overriding the defaults, e.g.
+            a configuration found by `models.tuning.tune_model`.
+    """
+    if model_name == "Logistic_Regression":
+        from sklearn.linear_model import LogisticRegression
+        model = LogisticRegression()
+    elif model_name == "Catboost":
+        from catboost import CatBoostClassifier
+        # No catboost_info/ training logs in the working directory.
+        model = CatBoostClassifier(verbose=0, thread_count=n_threads or -1, allow_writing_files=False)
+    elif model_name == "Random_Forest":
+        from sklearn.ensemble import RandomForestClassifier
+        model = RandomForestClassifier(n_jobs=n_threads)
+    elif model_name == "XGBoost":
+        from xgboost import XGBClassifier
+        model = XGBClassifier(verbosity=0, use_label_encoder=False, n_jobs=n_threads)
+    else:
+        raise ValueError(f"Unknown model: {model_name}")
+    if params:
+        model.set_params(**params)
+    return model
+
+
+def native_categorical_columns(X):
+    """Categorical columns of a frame produced by the 'native' encoding."""
+    if not isinstance(X, pd.DataFrame):
+        return []
+    return [col for col in X.columns if isinstance(X[col].dtype, pd.CategoricalDtype)]
+
+
+def prepare_model_input(model, X):
+    """
+    Pick the representation of `X` that suits `model`.
+
+    Frames from the 'native' encoding are given to CatBoost as integer codes
+    (declared through `cat_features` at fit time) and expanded to a sparse CSR
+    matrix for every other model. Dense one-hot frames are passed through.
+    """
+    categorical = native_categorical_columns(X)
+    if not categorical:
+        return X
+    if is_catboost(model):
+        return X.assign(**{col: X[col].cat.codes for col in categorical})
+    return sparse_from_native(X)
+
+
+def fit_model(model, X, y, eval_set=None):
+    """
+    Fit `model` on `X`, converting 'native' categoricals as needed.
+
+    `eval_set` is an optional `(X_val, y_val)` pair used for early stopping
+    by the boosting models.
+    """
+    categorical = native_categorical_columns(X)
+    if categorical and is_catboost(model):
+        model.set_params(cat_features=categorical)
+    if eval_set is None:
+        return model.fit(prepare_model_input(model, X), y)
+    X_val, y_val = eval_set
+    eval_set = [(prepare_model_input(model, X_val), y_val)]
+    if is_xgboost(model):
+        return model.fit(prepare_model_input(model, X), y, eval_set=eval_set, verbose=False)
+    return model.fit(prepare_model_input(model, X), y, eval_set=eval_set)
+
+
+def save_model(model, model_name, model_dir="models"):
+    """
+    Save a fitted model as `<model_dir>/<model_name>.pkl`.
+
+    CatBoost models are also saved in the native `.cbm` format, which the API
+    and batch scoring load without joblib, and, when they have no categorical
+    features, as `.npz` arrays for the NumPy backend (`models.oblivious`).
+
+    Returns:
+        list: The paths written.
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    paths = [os.path.join(model_dir, f"{model_name}.pkl")]
+    joblib.dump(model, paths[0])
+    if is_catboost(model):
+        paths.append(os.path.join(model_dir, f"{model_name}{CATBOOST_FORMAT}"))
+        model.save_model(paths[-1])
+        if not model.get_cat_feature_indices():
+            from models.oblivious import export_oblivious
+
+            # The NumPy backend is optional: a model it cannot evaluate is
+            # still served from the .cbm and .pkl files.
+            try:
+                paths.append(export_oblivious(model, os.path.join(model_dir, f"{model_name}{NUMPY_FORMAT}")))
+            except ValueError as error:
+                print(f"[{model_name}] not exported for the NumPy backend: {error}")
+    return paths
+
+
+def _fit_and_evaluate(model_name, n_threads, X_train, Y_train, X_val, Y_val, model_dir="models", params=None):
+    """
+    Fit one model, time it, score it on the validation split and save it
+    (see `save_model`).
+
+    Returns:
+        dict: Wall/CPU time and peak memory of the fit, predict and write
+            steps, plus validation metrics.
+    """
+    from sklearn.metrics import accuracy_score, classification_report, log_loss, roc_auc_score
+
+    model = build_model(model_name, n_threads, params)
+
+    with measure() as fit:
+        fit_model(model, X_train, Y_train)
+
+    with measure() as predict:
+        proba = model.predict_proba(prepare_model_input(model, X_val))[:, 1]
+    Y_pred = (proba >= 0.5).astype(int)
+
+    with measure() as write:
+        save_model(model, model_name, model_dir)
+
+    return {
+        "model": model_name,
+        "n_threads": n_threads,
+        "tuned": bool(params),
+        "fit_seconds": fit["wall_seconds"],
+        "fit_cpu_seconds": fit["cpu_seconds"],
+        "fit_peak_rss_mb": fit["peak_rss_mb"],
+        "predict_seconds": predict["wall_seconds"],
+        "predict_cpu_seconds": predict["cpu_seconds"],
+        "predict_peak_rss_mb": predict["peak_rss_mb"],
+        "write_seconds": write["wall_seconds"],
+        "peak_rss_mb": max(fit["peak_rss_mb"], predict["peak_rss_mb"], write["peak_rss_mb"]),
+        "accuracy": accuracy_score(Y_val, Y_pred),
+        "log_loss": log_loss(Y_val, proba, labels=[0, 1]),
+        "roc_auc": roc_auc_score(Y_val, proba),
+        "classification_report": classification_report(Y_val, Y_pred),
     }
 
 
-    for model_name, model in models.items():
-        print(f"Evaluating model: {model_name}")
-        model.fit(X_train, Y_train)
-        Y_pred=model.predict(X_val)
-        print("Accuracy:", accuracy_score(Y_val, Y_pred))
-        print("Classification Report:\n", classification_report(Y_val, Y_pred))
-        os.makedirs("models", exist_ok=True)
-        joblib.dump(model, f"models/{model_name}.pkl")
+def train_model(train,target,parallel=False,n_jobs=None,summary_path="models/training_summary.json",model_dir="models",params=None):
+    """
+    Train and evaluate every candidate model on the same 80/20 split.
+
+    Args:
+        train (pd.DataFrame): Preprocessed features, either one-hot ('dummies')
+            or integer-coded ('native'); each model gets the representation
+            that suits it (see `prepare_model_input`).
+        target (pd.Series): CHURN labels.
+        parallel (bool): Fit the candidates at the same time, one process each.
+        n_jobs (int, optional): Core budget, split evenly between the models in
+            parallel mode. Defaults to all cores.
+        summary_path (str): Where to write the machine-readable summary.
+        model_dir (str): Directory the fitted models are saved to, as `<name>.pkl`.
+        params (dict, optional): `{model_name: hyperparameters}` for models that
+            should not use their defaults (see `models.tuning.load_best_params`).
+
+    Returns:
+        dict: Per-model fit/predict time, peak memory and validation metrics.
+    """
+    from sklearn.model_selection import train_test_split
+
+    X_train, X_val, Y_train, Y_val = train_test_split(train, target, test_size=0.2, random_state=42)
+
+    budget = n_jobs or os.cpu_count() or 1
+    n_threads = max(1, budget // len(MODEL_NAMES)) if parallel else budget
+    params = params or {}
+
+    if parallel:
+        # One fresh process per model, so each reported peak RSS is its own.
+        with ProcessPoolExecutor(max_workers=len(MODEL_NAMES), max_tasks_per_child=1,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [
+                executor.submit(_fit_and_evaluate, model_name, n_threads, X_train, Y_train, X_val, Y_val, model_dir,
+                                params.get(model_name))
+                for model_name in MODEL_NAMES
+            ]
+            results = [future.result() for future in futures]
+    else:
+        results = [
+            _fit_and_evaluate(model_name, n_threads, X_train, Y_train, X_val, Y_val, model_dir,
+                              params.get(model_name))
+            for model_name in MODEL_NAMES
+        ]
+
+    summary = {}
+    for result in results:
+        print(f"Evaluating model: {result['model']}")
+        print("Accuracy:", result["accuracy"])
+        print("Classification Report:\n", result.pop("classification_report"))
+        summary[result.pop("model")] = result
 
+    if summary_path:
+        os.makedirs(os.path.dirname(summary_path) or ".", exist_ok=True)
+        with open(summary_path, "w") as f:
+            json.dump(summary, f, indent=2)
 
-    return True
-    
+    return summary
@@ -0,0 +1,262 @@
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.metrics import log_loss
+from sklearn.model_selection import train_test_split
+
+from models.trainer import build_model, fit_model, prepare_model_input
+
+TUNING_DIR = "models/tuning"
+TUNABLE_MODELS = ["Catboost", "XGBoost"]
+
+# Name of the boosting-rounds parameter of each tunable model.
+ROUNDS_PARAM = {"Catboost": "iterations", "XGBoost": "n_estimators"}
+
+
+def _log_uniform(low, high):
+    return lambda rng: float(np.exp(rng.uniform(np.log(low), np.log(high))))
+
+
+def _uniform(low, high):
+    return lambda rng: float(rng.uniform(low, high))
+
+
+def _integer(low, high):
+    return lambda rng: int(rng.integers(low, high + 1))
+
+
+def _choice(*values):
+    return lambda rng: values[rng.integers(len(values))]
+
+
+SEARCH_SPACES = {
+    "Catboost": {
+        "learning_rate": _log_uniform(0.02, 0.3),
+        # At most `models.oblivious.MAX_DEPTH` (16, CatBoost's own limit), so
+        # the tuned model can still be exported for the NumPy backend.
+        "depth": _integer(4, 10),
+        "l2_leaf_reg": _log_uniform(1, 30),
+        "random_strength": _log_uniform(0.1, 10),
+        "bagging_temperature": _uniform(0, 1),
+        "border_count": _choice(64, 128, 254),
+    },
+    "XGBoost": {
+        "learning_rate": _log_uniform(0.02, 0.3),
+        "max_depth": _integer(3, 10),
+        "min_child_weight": _log_uniform(1, 50),
+        "subsample": _uniform(0.6, 1.0),
+        "colsample_bytree": _uniform(0.4, 1.0),
+        "reg_lambda": _log_uniform(0.5, 20),
+        "gamma": _log_uniform(1e-3, 5),
+    },
+}
+
+
+def sample_config(model_name, rng):
+    """Draw one configuration from the search space of `model_name`."""
+    return {name: sample(rng) for name, sample in SEARCH_SPACES[model_name].items()}
+
+
+def best_params_path(model_name, tuning_dir=TUNING_DIR):
+    return os.path.join(tuning_dir, f"{model_name}_best.json")
+
+
+def load_best_params(tuning_dir=TUNING_DIR, model_names=TUNABLE_MODELS):
+    """
+    Best configurations persisted by `tune_model`, as `{model_name: params}`.
+
+    Models that were never tuned are left out, so `train_model` falls back to
+    their library defaults.
+    """
+    params = {}
+    for model_name in model_names:
+        path = best_params_path(model_name, tuning_dir)
+        if os.path.exists(path):
+            with open(path) as f:
+                params[model_name] = json.load(f)["params"]
+    return params
+
+
+# Trial data, set once per worker process by `_init_worker`.
+_data = None
+
+
+def _init_worker(X_train, y_train, X_val, y_val):
+    global _data
+    _data = (X_train, y_train, X_val, y_val)
+
+
+def _run_trial(model_name, params, n_rows, n_rounds, n_threads):
+    """
+    Fit one configuration on the first `n_rows` (pre-shuffled) training rows
+    for at most `n_rounds` boosting rounds, stopping early on validation log loss.
+    """
+    X_train, y_train, X_val, y_val = _data
+    model = build_model(model_name, n_threads, params)
+    model.set_params(**{ROUNDS_PARAM[model_name]: n_rounds,
+                        "early_stopping_rounds": max(10, n_rounds // 10)})
+    if model_name == "XGBoost":
+        model.set_params(eval_metric="logloss")
+
+    start = time.perf_counter()
+    fit_model(model, X_train.iloc[:n_rows], y_train.iloc[:n_rows], eval_set=(X_val, y_val))
+    fit_seconds = time.perf_counter() - start
+
+    proba = model.predict_proba(prepare_model_input(model, X_val))[:, 1]
+    best_iteration = model.get_best_iteration() if model_name == "Catboost" else model.best_iteration
+    return {
+        "log_loss": log_loss(y_val, proba, labels=[0, 1]),
+        "best_rounds": int(best_iteration) + 1 if best_iteration is not None else n_rounds,
+        "fit_seconds": fit_seconds,
+    }
+
+
+def hyperband_brackets(max_rounds, min_rounds, eta):
+    """
+    Successive-halving schedules of Hyperband, most aggressive first.
+
+    Each bracket is a list of rungs `(n_configs, resource)`, where `resource`
+    is the fraction of the full budget (rows and rounds) a trial gets. Every
+    rung keeps the best `1/eta` of the previous one at `eta` times the resource.
+    """
+    s_max = max(0, int(math.floor(math.log(max_rounds / min_rounds, eta) + 1e-9)))
+    brackets = []
+    for s in range(s_max, -1, -1):
+        n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        brackets.append([(max(1, int(n * eta ** -i)), eta ** (i - s)) for i in range(s + 1)])
+    return brackets
+
+
+def tune_model(model_name, train, target, max_rounds=1000, min_rounds=30, min_rows=20_000, eta=3,
+               time_budget=None, max_trials=None, hyperband=True, n_jobs=None, seed=42,
+               tuning_dir=TUNING_DIR):
+    """
+    Budgeted hyperparameter search with successive halving over rows and
+    boosting rounds.
+
+    Random configurations start on a small slice of the training rows and few
+    boosting rounds; after each rung only the best `1/eta` (by validation log
+    loss) continue with `eta` times more rows and rounds, up to the full split
+    and `max_rounds`. Every trial stops early once validation log loss stops
+    improving. With `hyperband=True` the search runs Hyperband's brackets, from
+    many cheap trials to few full-budget ones; otherwise only the most
+    aggressive successive-halving bracket.
+
+    Trials of a rung run in parallel processes that share the `n_jobs` core
+    budget. They are spawned rather than forked, as a child forked after OpenMP
+    has started its threads in this process can hang; each worker receives one
+    copy of the split when it starts. `time_budget` and `max_trials` are only checked between rungs: no
+    new rung is started once `time_budget` seconds have elapsed or `max_trials`
+    trials have run, but a started rung always finishes, so the search can run
+    over the budget by up to one rung.
+
+    The best configuration is written to `tuning_dir/<model_name>_best.json`,
+    with its boosting rounds set to where early stopping found the validation
+    optimum on the full split. If the best trial only had part of the rows or
+    rounds, its round count would underfit the full data, so the configuration
+    is first refitted on the full split with `max_rounds` (after the budget).
+
+    Args:
+        model_name (str): One of `TUNABLE_MODELS`.
+        train (pd.DataFrame): Preprocessed features.
+        target (pd.Series): CHURN labels.
+        max_rounds (int): Boosting rounds of a full-budget trial.
+        min_rounds (int): Boosting rounds of the cheapest trial.
+        min_rows (int): Smallest number of training rows a trial is fitted on.
+        eta (int): Halving rate.
+        time_budget (float, optional): Wall-clock budget in seconds.
+        max_trials (int, optional): Maximum number of trials.
+        hyperband (bool): Run all Hyperband brackets instead of one.
+        n_jobs (int, optional): Core budget. Defaults to all cores.
+        seed (int): Seed of the split, the row order and the sampled configurations.
+        tuning_dir (str): Where the best configuration is saved.
+
+    Returns:
+        dict: Best parameters and validation log loss, plus the trial history.
+    """
+    if model_name not in SEARCH_SPACES:
+        raise ValueError(f"No search space for model: {model_name}")
+
+    X_train, X_val, y_train, y_val = train_test_split(train, target, test_size=0.2,
+                                                      random_state=seed, stratify=target)
+    # The split is shuffled, so row subsets are prefixes: a promoted trial sees a superset of its rows.
+
+    rng = np.random.default_rng(seed)
+    brackets = hyperband_brackets(max_rounds, min_rounds, eta)
+    if not hyperband:
+        brackets = brackets[:1]
+
+    budget = n_jobs or os.cpu_count() or 1
+    workers = min(budget, max(rungs[0][0] for rungs in brackets))
+    deadline = time.monotonic() + time_budget if time_budget else None
+    start = time.monotonic()
+    history = []
+    best = None
+
+    def exhausted():
+        return ((deadline is not None and time.monotonic() >= deadline)
+                or (max_trials is not None and len(history) >= max_trials))
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(X_train, y_train, X_val, y_val)) as executor:
+        for bracket, rungs in enumerate(brackets):
+            configs = [sample_config(model_name, rng) for _ in range(rungs[0][0])]
+            for rung, (n_configs, resource) in enumerate(rungs):
+                if exhausted():
+                    break
+                configs = configs[:n_configs]
+                if max_trials is not None:
+                    configs = configs[:max_trials - len(history)]
+                n_rows = min(len(X_train), max(min_rows, int(len(X_train) * resource)))
+                n_rounds = max(min_rounds, int(round(max_rounds * resource)))
+                n_threads = max(1, budget // min(len(configs), workers))
+
+                futures = [executor.submit(_run_trial, model_name, params, n_rows, n_rounds, n_threads)
+                           for params in configs]
+                results = []
+                for params, future in zip(configs, futures):
+                    result = future.result()
+                    trial = {"bracket": bracket, "rung": rung, "n_rows": n_rows, "n_rounds": n_rounds,
+                             "params": params, **result}
+                    history.append(trial)
+                    results.append(trial)
+                    # Every trial is scored on the same validation split, so log losses compare across rungs.
+                    if best is None or trial["log_loss"] < best["log_loss"]:
+                        best = trial
+                    print(f"[{model_name}] bracket {bracket} rung {rung}: {n_rows} rows, "
+                          f"{n_rounds} rounds -> log loss {trial['log_loss']:.5f}")
+
+                results.sort(key=lambda trial: trial["log_loss"])
+                configs = [trial["params"] for trial in results[:max(1, n_configs // eta)]]
+            if exhausted():
+                break
+
+        if best is not None and (best["n_rows"] < len(X_train) or best["n_rounds"] < max_rounds):
+            refit = executor.submit(_run_trial, model_name, best["params"], len(X_train), max_rounds, budget)
+            best = {**best, "n_rows": len(X_train), "n_rounds": max_rounds, **refit.result(), "refit": True}
+            print(f"[{model_name}] refitted the best configuration on {len(X_train)} rows -> "
+                  f"log loss {best['log_loss']:.5f}, {best['best_rounds']} rounds")
+
+    if best is None:
+        raise RuntimeError(f"Tuning budget exhausted before any {model_name} trial finished")
+
+    params = {**best["params"], ROUNDS_PARAM[model_name]: best["best_rounds"]}
+    summary = {
+        "model": model_name,
+        "params": params,
+        "log_loss": best["log_loss"],
+        "n_rows": best["n_rows"],
+        "refit": best.get("refit", False),
+        "n_trials": len(history),
+        "elapsed_seconds": time.monotonic() - start,
+        "history": history,
+    }
+    os.makedirs(tuning_dir, exist_ok=True)
+    with open(best_params_path(model_name, tuning_dir), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
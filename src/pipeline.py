@@ -1,32 +1,226 @@
+import argparse
+import json
 import sys
 import os
 import pandas as pd
+from data import feature_store, ingest_data
 from data.ingest_data import load_data
-from preprocess.preprocess import preprocess
-from models.trainer import train_model
+from data.feature_store import MANIFEST, load_features, save_features, table_files
+from preprocess import features as features_module
+from preprocess import preprocess as preprocess_module
+from preprocess.preprocess import ChurnPreprocessor, preprocess
+from models import cross_validation, oblivious, serialization, trainer, tuning
+from models.trainer import MODEL_NAMES, train_model
+from models.cross_validation import cross_validate_model
+from models.incremental import is_superseded, update_models
+from models.serialization import CATBOOST_FORMAT, NUMPY_FORMAT
+from models.tuning import TUNABLE_MODELS, best_params_path, load_best_params, tune_model
+from utils.instrumentation import RunReport
+from utils.stages import CACHE_DIR, code_digest, file_digest, publish, run_stage
 
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
+RAW_FILES = ['train.csv', 'test.csv', 'SampleSubmission.csv']
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Expresso churn training pipeline.")
+    parser.add_argument('--raw-dir', default='data/raw', help="Directory holding the raw CSV files")
+    parser.add_argument('--parallel', action='store_true', help="Train the candidate models concurrently")
+    parser.add_argument('--n-jobs', type=int, default=None, help="Core budget shared by the models")
+    parser.add_argument('--encoding', choices=['dummies', 'native'], default='dummies',
+                        help="'native' keeps categoricals integer-coded (CatBoost cat_features, sparse CSR for the others)")
+    parser.add_argument('--lean', action='store_true',
+                        help="Preprocess into float32 numerics (instead of float64) to cut memory")
+    parser.add_argument('--features', action='store_true',
+                        help="Add engineered ratio features (recharge, revenue and usage ratios)")
+    parser.add_argument('--cv-folds', type=int, default=None,
+                        help="Also run stratified K-fold evaluation (cached out-of-fold predictions)")
+    parser.add_argument('--tune', action='store_true',
+                        help="Tune CatBoost and XGBoost with successive halving before training")
+    parser.add_argument('--tune-budget', type=float, default=600,
+                        help="Wall-clock budget of the search in seconds, per model")
+    parser.add_argument('--tune-trials', type=int, default=None, help="Maximum number of trials per model")
+    parser.add_argument('--incremental', default=None, metavar='CSV',
+                        help="Instead of retraining, continue boosting the published CatBoost and XGBoost "
+                             "models on this new labelled slice")
+    parser.add_argument('--extra-rounds', type=int, default=100,
+                        help="Boosting rounds added per model in --incremental mode")
+    parser.add_argument('--holdout-size', type=float, default=0.2,
+                        help="Fraction of the new slice held out to decide whether to promote")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Where stage outputs are cached")
+    parser.add_argument('--force', action='store_true', help="Re-run every stage even if its output is cached")
+    parser.add_argument('--report', default='models/run_report.json',
+                        help="Where to write the wall time, CPU time and peak memory of every stage")
+    args = parser.parse_args(argv)
+
+    # Every stage is cached under a hash of its upstream stage, its code and
+    # its parameters, so a re-run only pays for the stages that changed.
+    # Time and memory of each stage (and of its steps) go into the run report.
+    report = RunReport(argv=sys.argv[1:] if argv is None else list(argv))
+    stage = dict(cache_dir=args.cache_dir, force=args.force, report=report)
+
+    # Monthly refresh: encode only the new slice with the published
+    # preprocessor and warm-start the published models on it, rather than
+    # re-running every stage on the full history. A model is only replaced
+    # when its holdout log loss does not regress.
+    if args.incremental:
+        with report.stage('load'):
+            new_data = pd.read_csv(args.incremental)
+        if 'CHURN' not in new_data:
+            parser.error(f"{args.incremental} has no CHURN column")
+        with report.stage('transform', rows=len(new_data)):
+            preprocessor = ChurnPreprocessor.load('models/preprocessor.json')
+            features = preprocessor.transform(new_data, args.encoding, args.lean)
+        with report.stage('update_models'):
+            update_models(features, new_data['CHURN'], model_dir='models', extra_rounds=args.extra_rounds,
+                          holdout_size=args.holdout_size, n_jobs=args.n_jobs,
+                          summary_path='models/incremental_summary.json')
+        report.save(args.report)
+        print(report.summary())
+        print("✅ Incremental update finished")
+        return
 
     # Load data
-    train, test, sample_sub = load_data('data/raw')
+    def ingest(out_dir):
+        with report.stage('load'):
+            train, test, sample_sub = load_data(args.raw_dir)
+        with report.stage('write'):
+            train.to_pickle(os.path.join(out_dir, 'train.pkl'))
+            test.to_pickle(os.path.join(out_dir, 'test.pkl'))
+            sample_sub.to_pickle(os.path.join(out_dir, 'sample_sub.pkl'))
+
+    ingest_dir, ingest_key, _ = run_stage(
+        'ingest', ingest, **stage,
+        inputs={name: file_digest(os.path.join(args.raw_dir, name)) for name in RAW_FILES},
+        code=code_digest(ingest_data),
+    )
+
+    # Preprocess data and keep the fitted preprocessor next to the models,
+    # so new rows can be scored without re-running over the training set
+    def preprocess_stage(out_dir):
+        with report.stage('load'):
+            train = pd.read_pickle(os.path.join(ingest_dir, 'train.pkl'))
+            test = pd.read_pickle(os.path.join(ingest_dir, 'test.pkl'))
+        with report.stage('fit'):
+            preprocessor = ChurnPreprocessor(features=args.features).fit(train, test)
+            preprocessor.save(os.path.join(out_dir, 'preprocessor.json'))
+        with report.stage('transform', rows=len(train) + len(test)):
+            train_clean, test_clean, churn = preprocess(train,test,preprocessor,args.encoding,args.lean)
+        with report.stage('write'):
+            save_features(train_clean, out_dir, 'train')
+            save_features(test_clean, out_dir, 'test', ids=test['user_id'])
+            save_features(churn, out_dir, 'churn')
 
-    # Preprocess data
-    train_clean, test_clean, churn = preprocess(train,test)
-    train_clean.to_csv('data/processed/train.csv', index=False)
-    test_clean.to_csv('data/processed/test.csv', index=False)
-    churn.to_csv('data/processed/churn.csv', index=False)
+    preprocess_dir, preprocess_key, _ = run_stage(
+        'preprocess', preprocess_stage, **stage,
+        upstream=ingest_key,
+        code=code_digest(preprocess_module, features_module, feature_store),
+        params={'encoding': args.encoding, 'lean': args.lean, 'features': args.features},
+    )
+    # Processed features are a memory-mapped binary store (see data.feature_store),
+    # so later stages and batch scoring load them without parsing text
+    def load_processed():
+        return (load_features(preprocess_dir, 'train'),
+                load_features(preprocess_dir, 'test'),
+                load_features(preprocess_dir, 'churn'))
+
+    with report.stage('publish_processed'):
+        publish(os.path.join(preprocess_dir, 'preprocessor.json'), 'models/preprocessor.json')
+        for name in ['train', 'test', 'churn']:
+            for path in table_files(preprocess_dir, name):
+                publish(path, os.path.join('data/processed', os.path.basename(path)))
+        publish(os.path.join(preprocess_dir, MANIFEST), os.path.join('data/processed', MANIFEST))
+
+    # Tune the boosting models within a fixed compute budget
+    params = {}
+    if args.tune:
+        def tune_stage(out_dir):
+            train_clean, _, churn = load_processed()
+            for model_name in TUNABLE_MODELS:
+                tune_model(model_name, train_clean, churn, time_budget=args.tune_budget,
+                           max_trials=args.tune_trials, n_jobs=args.n_jobs, tuning_dir=out_dir)
+
+        tune_dir, _, _ = run_stage(
+            'tune', tune_stage, **stage,
+            upstream=preprocess_key,
+            code=code_digest(tuning, trainer),
+            params={'budget': args.tune_budget, 'trials': args.tune_trials},
+        )
+        for model_name in TUNABLE_MODELS:
+            publish(best_params_path(model_name, tune_dir), best_params_path(model_name))
+        params = load_best_params(tune_dir)
 
     # Train model
-    print("Please wait for the pipeline to finish...")
-    model = train_model(train_clean,churn)
+    def train_stage(out_dir):
+        print("Please wait for the pipeline to finish...")
+        train_clean, _, churn = load_processed()
+        summary = train_model(train_clean,churn,parallel=args.parallel,n_jobs=args.n_jobs,
+                              summary_path=os.path.join(out_dir, 'training_summary.json'),model_dir=out_dir,
+                              params=params)
+        # Models may be fitted in worker processes, which measure themselves
+        for model_name, result in summary.items():
+            for step in ['fit', 'predict']:
+                report.add(f'{model_name}.{step}', result[f'{step}_seconds'], result[f'{step}_cpu_seconds'],
+                           result[f'{step}_peak_rss_mb'])
+
+    # Thread settings do not change the fitted models, so they are not part of the key
+    train_dir, train_key, _ = run_stage(
+        'train', train_stage, **stage,
+        upstream=preprocess_key,
+        # The models are also written through serialization (.cbm) and oblivious (.npz).
+        code=code_digest(trainer, serialization, oblivious),
+        params=params,
+    )
+    with report.stage('publish_models'):
+        for model_name in MODEL_NAMES:
+            trained_path = os.path.join(train_dir, f'{model_name}.pkl')
+            # --incremental backs up the model it replaces; publishing that same
+            # model again from the cache would silently undo the update
+            if is_superseded(trained_path, model_name, 'models'):
+                print(f"Kept models/{model_name}.*: the trained model was replaced by an incremental "
+                      f"update (restore it from models/backup to roll back)")
+                continue
+            publish(trained_path, f'models/{model_name}.pkl')
+            for ext in (CATBOOST_FORMAT, NUMPY_FORMAT):
+                native_path = os.path.join(train_dir, f'{model_name}{ext}')
+                public_path = f'models/{model_name}{ext}'
+                if os.path.exists(native_path):
+                    publish(native_path, public_path)
+                elif os.path.exists(public_path):
+                    # A format this model was not saved in (e.g. no .npz for a 'native'
+                    # CatBoost model) would otherwise leave an older model behind it
+                    os.remove(public_path)
+                    print(f"Removed {public_path}: not produced by this training run")
+        publish(os.path.join(train_dir, 'training_summary.json'), 'models/training_summary.json')
 
+    # Cross-validate on log loss, the competition metric
+    if args.cv_folds:
+        def evaluate_stage(out_dir):
+            train_clean, test_clean, churn = load_processed()
+            results = {
+                model_name: cross_validate_model(model_name, train_clean, churn, test_clean,
+                                                 params=params.get(model_name), n_splits=args.cv_folds,
+                                                 n_jobs=args.n_jobs)
+                for model_name in MODEL_NAMES
+            }
+            with open(os.path.join(out_dir, 'cv_summary.json'), 'w') as f:
+                json.dump(results, f, indent=2)
 
+        evaluate_dir, _, _ = run_stage(
+            'evaluate', evaluate_stage, **stage,
+            upstream=train_key,
+            code=code_digest(cross_validation),
+            # Tuned models are evaluated with the parameters they are trained with
+            params={'cv_folds': args.cv_folds, 'model_params': params},
+        )
+        with open(os.path.join(evaluate_dir, 'cv_summary.json')) as f:
+            for model_name, cv in json.load(f).items():
+                print(f"{model_name}: CV log loss {cv['log_loss']:.5f}, AUC {cv['roc_auc']:.5f} ({cv['oof_path']})")
 
+    report.save(args.report)
+    print(report.summary())
     print("✅ Pipeline executed successfully")
 
 if __name__ == "__main__":
@@ -1,16 +1,136 @@
-import joblib
+import argparse
+import os
+import sys
+from collections import deque
+from multiprocessing import Pool
+
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from data.ingest_data import DEFAULT_CHUNKSIZE, read_csv_chunks
+from data.feature_store import load_features, load_ids
+from preprocess.preprocess import ChurnPreprocessor
+from models.serialization import load_model
+from models.trainer import prepare_model_input
+
+# Loaded once per worker process by `_init_worker`.
+_model = None
+_preprocessor = None
+_encoding = 'dummies'
+_features = None
+_ids = None
+
+
+def _init_worker(model_path, preprocessor_path, encoding='dummies', store=None, table='test', backend='catboost'):
+    global _model, _preprocessor, _encoding, _features, _ids
+    _model = load_model(model_path, backend)
+    _encoding = encoding
+    if store is None:
+        _preprocessor = ChurnPreprocessor.load(preprocessor_path)
+    else:
+        # Every worker maps the same processed file; no rows are copied between processes.
+        _features = load_features(store, table)
+        _ids = load_ids(store, table)
+
+
+def _score_chunk(chunk):
+    features = prepare_model_input(_model, _preprocessor.transform(chunk, _encoding))
+    return pd.DataFrame({
+        'user_id': chunk['user_id'].to_numpy(),
+        'CHURN': _model.predict_proba(features)[:, 1],
+    })
+
+
+def _score_rows(bounds):
+    start, stop = bounds
+    features = prepare_model_input(_model, _features.iloc[start:stop])
+    return pd.DataFrame({
+        'user_id': _ids[start:stop] if _ids is not None else np.arange(start, stop),
+        'CHURN': _model.predict_proba(features)[:, 1],
+    })
+
+
+def score_file(input_path, model_path, preprocessor_path, output_path,
+               chunksize=DEFAULT_CHUNKSIZE, workers=None, encoding='dummies', table='test',
+               backend='catboost'):
+    """
+    Score a raw CSV out of core and write `user_id,CHURN` rows to `output_path`.
+
+    `input_path` may also be a processed feature store directory (as written
+    by the pipeline to `data/processed`), in which case `table` is scored from
+    memory-mapped features and the preprocessor is not needed.
+
+    The input is streamed in chunks which are fanned out to `workers` processes,
+    each loading the model once. Results are written incrementally and in input
+    order, and at most two chunks per worker are in flight, so memory stays
+    bounded by the chunk size whatever the size of the input. `encoding` must
+    match the one the model was trained with. `backend='numpy'` scores
+    CatBoost models with `models.oblivious` instead of the CatBoost runtime.
+
+    Returns:
+        int: Number of rows scored.
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    if os.path.isdir(input_path):
+        n_total = len(load_features(input_path, table))
+        tasks = ((start, min(start + chunksize, n_total)) for start in range(0, n_total, chunksize))
+        score = _score_rows
+        initargs = (model_path, None, encoding, input_path, table, backend)
+    else:
+        tasks = read_csv_chunks(input_path, chunksize)
+        score = _score_chunk
+        initargs = (model_path, preprocessor_path, encoding, None, 'test', backend)
+    n_rows = 0
+
+    with open(output_path, 'w', newline='') as out:
+        def write(result):
+            nonlocal n_rows
+            result.to_csv(out, header=n_rows == 0, index=False)
+            n_rows += len(result)
+
+        if workers == 1:
+            _init_worker(*initargs)
+            for task in tasks:
+                write(score(task))
+            return n_rows
+
+        with Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.apply_async(score, (task,)))
+                if len(pending) >= 2 * workers:
+                    write(pending.popleft().get())
+            while pending:
+                write(pending.popleft().get())
+
+    return n_rows
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a raw Expresso CSV with a trained churn model.")
+    parser.add_argument('--input', default='data/raw/test.csv',
+                        help="Raw CSV, or processed feature store directory, to score")
+    parser.add_argument('--table', default='test', help="Table to score when --input is a feature store")
+    parser.add_argument('--model', default='models/Catboost.pkl', help="Fitted model (.pkl, or .cbm/.npz for CatBoost)")
+    parser.add_argument('--preprocessor', default='models/preprocessor.json',
+                        help="Preprocessor artifact saved by the training pipeline")
+    parser.add_argument('--output', default='data/predicted/catboost_expresso.csv', help="Submission file to write")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument('--encoding', choices=['dummies', 'native'], default='dummies',
+                        help="Feature encoding the model was trained with")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--backend', choices=['catboost', 'numpy'], default='catboost',
+                        help="Score CatBoost models with the CatBoost runtime or with NumPy")
+    args = parser.parse_args(argv)
 
-test=pd.read_csv('data/processed/test.csv')
-sample_sub = pd.read_csv('data/raw/SampleSubmission.csv')
+    n_rows = score_file(args.input, args.model, args.preprocessor, args.output,
+                        chunksize=args.chunksize, workers=args.workers, encoding=args.encoding,
+                        table=args.table, backend=args.backend)
+    print(f"Scored {n_rows} rows into {args.output}")
+    print("Completed......................")
 
-model=joblib.load("models/Catboost.pkl")
-predictions = model.predict_proba(test)[:, 1]
-baseline_sub = sample_sub.copy()
-baseline_sub['CHURN'] = predictions
-baseline_sub.to_csv('data/predicted/catboost_expresso.csv', index=False)
-print("Completed......................")
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import numpy as np
+
+# Derived columns: name -> (numerator columns, denominator columns). Each one is
+# the sum of its numerator columns divided by the sum of its denominator
+# columns, computed on the median-imputed numerics.
+ENGINEERED_FEATURES = {
+    # Recharge behaviour: average top-up amount and top-ups per active day.
+    'MONTANT_PER_RECHARGE': (['MONTANT'], ['FREQUENCE_RECH']),
+    'RECHARGES_PER_ACTIVE_DAY': (['FREQUENCE_RECH'], ['REGULARITY']),
+    # Revenue: revenue per activity.
+    'ARPU_PER_ACTIVITY': (['ARPU_SEGMENT'], ['FREQUENCE']),
+    # Usage ratios: share of calls that stay on-net and data used per active day.
+    'ON_NET_SHARE': (['ON_NET'], ['ON_NET', 'ORANGE', 'TIGO']),
+    'DATA_VOLUME_PER_ACTIVE_DAY': (['DATA_VOLUME'], ['REGULARITY']),
+    # Activity frequency: share of activity spent on top packs.
+    'TOP_PACK_PER_ACTIVITY': (['FREQ_TOP_PACK'], ['FREQUENCE']),
+}
+FEATURE_NAMES = list(ENGINEERED_FEATURES)
+
+
+def _column_sum(numeric, position, columns):
+    # A single column is returned as a view; sums allocate one array.
+    total = numeric[:, position[columns[0]]]
+    for col in columns[1:]:
+        total = total + numeric[:, position[col]]
+    return total
+
+
+def engineer_features(numeric, columns, out=None):
+    """
+    Computes `FEATURE_NAMES` from a block of numeric columns, one whole-column
+    operation per feature, so any chunk of rows can be processed on its own.
+
+    A zero denominator gives 0 rather than inf or NaN; other NaN inputs
+    propagate.
+
+    Args:
+        numeric (np.ndarray): (n_rows, n_columns) numeric values.
+        columns (list): Name of every column of `numeric`.
+        out (np.ndarray, optional): (n_rows, len(FEATURE_NAMES)) buffer to fill,
+            e.g. a slice of the final feature matrix. Defaults to a new array
+            of `numeric`'s dtype.
+
+    Returns:
+        np.ndarray: The derived features, in `FEATURE_NAMES` order.
+    """
+    position = {col: j for j, col in enumerate(columns)}
+    if out is None:
+        out = np.empty((len(numeric), len(FEATURE_NAMES)), dtype=numeric.dtype)
+    for k, (numerator, denominator) in enumerate(ENGINEERED_FEATURES.values()):
+        denominator = _column_sum(numeric, position, denominator)
+        out[:, k] = 0
+        np.divide(_column_sum(numeric, position, numerator), denominator, out=out[:, k], where=denominator != 0)
+    return out
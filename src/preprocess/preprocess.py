@@ -1,36 +1,230 @@
+import json
+import os
 import pandas as pd
 import numpy as np
 from data.ingest_data import load_data
+from preprocess.features import FEATURE_NAMES, engineer_features
 
+# Bump whenever the layout of the saved preprocessor artifact changes.
+# Version 2 added `features`; version 1 artifacts load with `features=False`.
+PREPROCESSOR_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
 
-def preprocess(train,test):
+# Columns that never reach the model.
+DROP_COLUMNS = ['user_id', 'ZONE1', 'ZONE2', 'MRG', 'REVENUE']
+# Categorical columns, in the order their dummy columns are laid out.
+CATEGORICAL_COLUMNS = ['REGION', 'TOP_PACK', 'TENURE']
 
-    # splitting target variable and features
-    test=test
-    churn = train['CHURN']
-    train = train.drop('CHURN', axis=1)
-    data = pd.concat([train, test], sort=False)
-    # Dropping zone columns
-    data = data.drop(['ZONE1', 'ZONE2'], axis=1)
 
-    # Fill missing values in categorical columns with "Missing_{column_name}"
-    for col in data.select_dtypes(include=['object']).columns:
-        data[col].fillna(f'Missing_{col}', inplace=True)
-    # Fill missing values in numerical columns with the median
-    for col in data.select_dtypes(include=[np.number]).columns:
-        data[col].fillna(data[col].median(), inplace=True)
+class ChurnPreprocessor:
+    """
+    Fitted preprocessing step shared by training, batch scoring and the API.
+
+    `fit` captures the numeric medians, the category vocabularies and the final
+    column order; `transform` applies them to any chunk of raw rows. The fitted
+    state is small enough to be saved as JSON next to the model.
+
+    With `features=True`, the ratios of `preprocess.features` are appended
+    after the numeric columns.
+    """
+
+    def __init__(self, numeric_columns=None, medians=None, categories=None, version=PREPROCESSOR_VERSION,
+                 features=False):
+        self.numeric_columns = list(numeric_columns or [])
+        self.medians = dict(medians or {})
+        self.categories = {col: list(values) for col, values in (categories or {}).items()}
+        self.version = version
+        self.features = features
+
+    @property
+    def numeric_features(self):
+        """Numeric columns followed by the engineered features, if enabled."""
+        return self.numeric_columns + (FEATURE_NAMES if self.features else [])
+
+    @property
+    def columns(self):
+        """Final feature columns, in the order the model expects them."""
+        columns = list(self.numeric_features)
+        for col in CATEGORICAL_COLUMNS:
+            # The first level is dropped, as `pd.get_dummies(drop_first=True)` does.
+            columns += [f'{col}_{value}' for value in self.categories[col][1:]]
+        return columns
+
+    def fit(self, *frames):
+        """
+        Learns medians and category vocabularies from one or more raw frames.
+
+        Several frames (e.g. train and test) are treated as if they had been
+        concatenated, without building the combined copy.
+        """
+        first = frames[0]
+        self.numeric_columns = [
+            col for col in first.select_dtypes(include=[np.number]).columns
+            if col not in DROP_COLUMNS and col != 'CHURN'
+        ]
+        self.medians = {
+            col: float(np.nanmedian(np.concatenate([frame[col].to_numpy(dtype=np.float64) for frame in frames])))
+            for col in self.numeric_columns
+        }
+        self.categories = {}
+        for col in CATEGORICAL_COLUMNS:
+            values = set()
+            for frame in frames:
+                values.update(frame[col].dropna().unique())
+                if frame[col].isna().any():
+                    values.add(f'Missing_{col}')
+            self.categories[col] = sorted(values)
+        return self
+
+    def _numeric(self, data, out):
+        # Columns are copied straight into `out` (no intermediate sub-frame) and
+        # imputed in a single vectorized pass; engineered features are computed
+        # from the imputed values into the columns that follow.
+        n_numeric = len(self.numeric_columns)
+        numeric = out[:, :n_numeric]
+        for j, col in enumerate(self.numeric_columns):
+            numeric[:, j] = data[col].to_numpy()
+        medians = np.array([self.medians[col] for col in self.numeric_columns], dtype=out.dtype)
+        np.copyto(numeric, medians, where=np.isnan(numeric))
+        if self.features:
+            engineer_features(numeric, self.numeric_columns, out=out[:, n_numeric:])
+        return out
+
+    def _codes(self, data, col):
+        # Position of each value in the fitted vocabulary, -1 when unseen.
+        values = data[col].astype(object).fillna(f'Missing_{col}')
+        return pd.Categorical(values, categories=self.categories[col]).codes.astype(np.intp)
+
+    def transform(self, data, encoding='dummies', lean=False):
+        """
+        Encodes raw rows into the model's feature matrix in one vectorized pass.
+
+        Missing numerics are replaced by the fitted medians and categories
+        unseen during fitting leave all of their dummy columns at zero.
+
+        Args:
+            data (pd.DataFrame): Raw rows.
+            encoding (str): 'dummies' for the dense one-hot frame, 'native' for
+                integer-coded categoricals (see `sparse_from_native`).
+            lean (bool): Store numerics as float32 instead of float64. Dummies
+                are always uint8, as compact as the `pd.get_dummies` columns
+                they replace.
 
+        Returns:
+            pd.DataFrame: Features in `self.columns` order, indexed like `data`,
+                or, for 'native', the numeric columns followed by one
+                categorical column per entry of `CATEGORICAL_COLUMNS`.
+        """
+        if encoding == 'native':
+            return self._transform_native(data, lean)
+        if encoding != 'dummies':
+            raise ValueError(f"Unknown encoding: {encoding}")
 
-    data = data.drop(['MRG'], axis=1)
-    data = data.drop(['REVENUE'], axis=1)
-    data = pd.get_dummies(data, columns=['REGION', 'TOP_PACK', 'TENURE'], drop_first=True)
-    data = data.drop('user_id', axis=1)
+        columns = self.columns
+        n_numeric = len(self.numeric_features)
+        # Separate float and uint8 blocks, wrapped below without copying.
+        numeric = np.empty((len(data), n_numeric), dtype=np.float32 if lean else np.float64)
+        self._numeric(data, numeric)
+        dummies = np.zeros((len(data), len(columns) - n_numeric), dtype=np.uint8)
 
-    train = data.iloc[:len(churn), :]
-    test = data.iloc[len(churn):, :]
+        offset = 0
+        rows = np.arange(len(data))
+        for col in CATEGORICAL_COLUMNS:
+            codes = self._codes(data, col)
+            # Code 0 is the dropped level and -1 an unseen value: neither has a column.
+            hit = codes > 0
+            dummies[rows[hit], offset + codes[hit] - 1] = 1
+            offset += len(self.categories[col]) - 1
 
+        return pd.concat([
+            pd.DataFrame(numeric, columns=columns[:n_numeric], index=data.index, copy=False),
+            pd.DataFrame(dummies, columns=columns[n_numeric:], index=data.index, copy=False),
+        ], axis=1, copy=False)
 
+    def _transform_native(self, data, lean=False):
+        # Categories are the vocabulary positions, so the frame stays a few bytes
+        # per categorical cell and its codes line up with the dummy column layout.
+        numeric = np.empty((len(data), len(self.numeric_features)), dtype=np.float32 if lean else np.float64)
+        frame = pd.DataFrame(self._numeric(data, numeric), columns=self.numeric_features, index=data.index, copy=False)
+        for col in CATEGORICAL_COLUMNS:
+            frame[col] = pd.Categorical.from_codes(self._codes(data, col), categories=range(len(self.categories[col])))
+        return frame
+
+    def save(self, path):
+        """Writes the fitted state to a JSON artifact."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        state = {
+            'version': self.version,
+            'numeric_columns': self.numeric_columns,
+            'medians': self.medians,
+            'categories': self.categories,
+            'features': self.features,
+            'columns': self.columns,
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a preprocessor saved with `save`."""
+        with open(path) as f:
+            state = json.load(f)
+        if state.get('version') not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported preprocessor version {state.get('version')} in {path}; "
+                             f"expected one of {SUPPORTED_VERSIONS}.")
+        # Version 1 artifacts predate engineered features and have no `features` key.
+        return cls(state['numeric_columns'], state['medians'], state['categories'], PREPROCESSOR_VERSION,
+                   state.get('features', False))
+
+
+def preprocess(train,test,preprocessor=None,encoding='dummies',lean=False,features=False):
+
+    # splitting target variable and features; `transform` only reads the
+    # feature columns, so CHURN is not dropped (which would copy the frame)
+    churn = train['CHURN']
+
+    # Medians and dummy columns are learned on train and test together
+    if preprocessor is None:
+        preprocessor = ChurnPreprocessor(features=features).fit(train, test)
+
+    train = preprocessor.transform(train, encoding, lean)
+    test = preprocessor.transform(test, encoding, lean)
 
     return train,test,churn
 
 
+def sparse_from_native(frame):
+    """
+    Expands a 'native' encoded frame into a CSR matrix with the same columns as
+    the dense 'dummies' encoding, without materializing the zeros of the
+    one-hot blocks. Numeric values are all stored, zeros included: XGBoost
+    reads an entry missing from a sparse matrix as a missing value, not as 0.
+
+    Args:
+        frame (pd.DataFrame): Output of `ChurnPreprocessor.transform(..., encoding='native')`.
+
+    Returns:
+        scipy.sparse.csr_matrix: Numeric columns followed by drop-first one-hot blocks.
+    """
+    from scipy import sparse
+
+    categorical = [col for col in frame.columns if isinstance(frame[col].dtype, pd.CategoricalDtype)]
+    numeric = frame.drop(columns=categorical).to_numpy(dtype=np.float64)
+    n_rows, n_numeric = numeric.shape
+    blocks = [sparse.csr_matrix(
+        (numeric.ravel(), np.tile(np.arange(n_numeric), n_rows), np.arange(0, numeric.size + 1, n_numeric)),
+        shape=numeric.shape,
+    )]
+
+    rows = np.arange(len(frame))
+    for col in categorical:
+        codes = frame[col].cat.codes.to_numpy().astype(np.intp)
+        n_columns = len(frame[col].cat.categories) - 1
+        hit = codes > 0
+        block = sparse.csr_matrix(
+            (np.ones(hit.sum()), (rows[hit], codes[hit] - 1)),
+            shape=(len(frame), n_columns),
+        )
+        blocks.append(block)
+
+    return sparse.hstack(blocks, format='csr')
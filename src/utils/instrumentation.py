@@ -0,0 +1,138 @@
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (since the last `reset_peak_rss`, on Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def reset_peak_rss():
+    """Restart the peak-memory watermark from the current RSS. Linux only; a no-op elsewhere."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _children_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextmanager
+def measure():
+    """
+    Measure the wall time, CPU time and peak memory of a block.
+
+    CPU time includes worker processes that finished inside the block (e.g.
+    parallel training or scoring pools). Yields a dict that is filled in when
+    the block exits; callers may add their own fields to it.
+    """
+    record = {}
+    reset_peak_rss()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    children_cpu = _children_cpu_seconds()
+    try:
+        yield record
+    finally:
+        record["wall_seconds"] = time.perf_counter() - wall
+        record["cpu_seconds"] = time.process_time() - cpu + _children_cpu_seconds() - children_cpu
+        record["peak_rss_mb"] = peak_rss_mb()
+
+
+class RunReport:
+    """
+    Structured report of one pipeline run: wall time, CPU time and peak memory
+    of every (possibly nested) stage.
+
+        report = RunReport()
+        with report.stage("train") as record:
+            with report.stage("fit"):
+                ...
+            record["rows"] = n_rows
+        report.save("models/run_report.json")
+
+    The peak-memory watermark is reset when a stage starts, so a stage reports
+    its own peak; nested stages propagate their peak to the enclosing stage.
+    """
+
+    def __init__(self, **info):
+        self.info = dict(info)
+        self.started = time.time()
+        self.stages = []
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name, **info):
+        record = {"name": name, **info, "stages": []}
+        if self._stack:
+            parent = self._stack[-1]
+            parent["stages"].append(record)
+            # This stage resets the watermark; keep what the parent reached so far.
+            parent["_peak_rss_mb"] = max(parent.get("_peak_rss_mb", 0.0), peak_rss_mb())
+        else:
+            self.stages.append(record)
+        self._stack.append(record)
+        try:
+            with measure() as measured:
+                yield record
+        finally:
+            self._stack.pop()
+            measured["peak_rss_mb"] = max([measured["peak_rss_mb"], record.pop("_peak_rss_mb", 0.0)]
+                                          + [child["peak_rss_mb"] for child in record["stages"]])
+            record.update(measured)
+            if not record["stages"]:
+                del record["stages"]
+
+    def add(self, name, wall_seconds, cpu_seconds, peak_rss_mb, **info):
+        """Record a step measured elsewhere (e.g. in a worker process) under the current stage."""
+        record = {"name": name, **info, "wall_seconds": wall_seconds, "cpu_seconds": cpu_seconds,
+                  "peak_rss_mb": peak_rss_mb}
+        if self._stack:
+            self._stack[-1]["stages"].append(record)
+        else:
+            self.stages.append(record)
+        return record
+
+    def to_dict(self):
+        return {
+            **self.info,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started)),
+            "wall_seconds": time.time() - self.started,
+            "stages": self.stages,
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+    def summary(self):
+        """Human-readable table of the stages, one line per stage."""
+        lines = [f"{'stage':32s} {'wall s':>9s} {'cpu s':>9s} {'peak MB':>9s}"]
+
+        def add(records, depth):
+            for record in records:
+                label = "  " * depth + record["name"] + (" (cached)" if record.get("cached") else "")
+                lines.append(f"{label:32s} {record['wall_seconds']:9.2f} {record['cpu_seconds']:9.2f} "
+                             f"{record['peak_rss_mb']:9.1f}")
+                add(record.get("stages", []), depth + 1)
+
+        add(self.stages, 0)
+        return "\n".join(lines)
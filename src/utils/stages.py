@@ -0,0 +1,75 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+from contextlib import nullcontext
+
+CACHE_DIR = ".cache/pipeline"
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def code_digest(*objects):
+    """SHA-256 of the source files defining the given modules, classes or functions."""
+    digest = hashlib.sha256()
+    for path in sorted({inspect.getsourcefile(obj) for obj in objects}):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def fingerprint(**parts):
+    """Stable hash of JSON-serializable fingerprint parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def run_stage(name, compute, cache_dir=CACHE_DIR, force=False, report=None, **parts):
+    """
+    Run a pipeline stage unless its output for this fingerprint already exists.
+
+    The fingerprint hashes `parts` (upstream stage keys, input digests, code
+    digests and parameters). Outputs live in `cache_dir/<name>/<key>/`, which
+    `compute(out_dir)` fills; a stage that fails halfway leaves no output behind.
+    With a `report` (see `utils.instrumentation.RunReport`), the stage's time
+    and memory are recorded in it, including for cache hits.
+
+    Returns:
+        (str, str, bool): Output directory, stage key and whether it was cached.
+    """
+    key = fingerprint(stage=name, **parts)
+    out_dir = os.path.join(cache_dir, name, key[:16])
+    marker = os.path.join(out_dir, "_SUCCESS")
+    with report.stage(name, key=key[:12]) if report else nullcontext({}) as record:
+        record["cached"] = os.path.exists(marker) and not force
+        if record["cached"]:
+            print(f"[{name}] up to date ({key[:12]}), skipping")
+            return out_dir, key, True
+
+        print(f"[{name}] running ({key[:12]})")
+        tmp_dir = out_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        compute(tmp_dir)
+        with open(os.path.join(tmp_dir, "_SUCCESS"), "w") as f:
+            json.dump(parts, f, indent=2, default=str)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp_dir, out_dir)
+        return out_dir, key, False
+
+
+def publish(src, dst):
+    """Copy a stage output to its public location unless an identical file is there."""
+    if os.path.exists(dst) and file_digest(dst) == file_digest(src):
+        return False
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    shutil.copyfile(src, dst + ".tmp")
+    os.replace(dst + ".tmp", dst)
+    return True